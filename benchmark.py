@@ -0,0 +1,292 @@
+"""Benchmarks for the dimension extraction pipeline.
+
+Runs against saved IKEA product pages: the bodies in the on-disk page cache
+(filled by any scraping run), or a directory of saved .html files.
+
+Streamed downloads that stopped early (see stream_fetch) leave only the start
+of a page in the cache, and those are skipped. `--fetch-partial` downloads
+them again in full first, so the cache can serve as the corpus.
+
+    python benchmark.py [--pages DIR | --fetch-partial] [--limit N] [--repeat N] parsers
+    python benchmark.py [--pages DIR] [--limit N] [--repeat N] modes
+    python benchmark.py [--pages DIR] [--limit N] [--repeat N] extract
+    python benchmark.py [--pages DIR] [--limit N] [--repeat N] pool [--workers N]
+    python benchmark.py [--repeat N] finish [--rows N]
+
+`finish` needs no pages: it times finisher's per-row vs column-wise
+normalization on the split_output catalog repeated to N rows.
+"""
+import argparse
+import json
+import platform
+import re
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import dimension_patterns
+import fetch_policy
+import finisher
+import html_backends
+import page_cache
+import parse_pool
+import strategy_stats
+from dimensions import extract_dimensions_with_source
+
+
+def load_pages(pages_dir=None, limit=None):
+    """Return [(name, html)] from `pages_dir`/*.html, or from the page cache."""
+    if pages_dir:
+        files = sorted(Path(pages_dir).glob("*.html"))[:limit]
+        return [(f.name, f.read_text(encoding="utf-8", errors="replace")) for f in files]
+    return list(page_cache.iter_pages(limit))
+
+
+def fetch_partial_pages(limit=None):
+    """Download in full the pages the cache holds only partially; returns how many were stored."""
+    stored = 0
+    for url, entry in page_cache.partial_entries(limit):
+        try:
+            response = fetch_policy.get(url, timeout=15)
+        except fetch_policy.FetchError as e:
+            print(f"  [SKIP] {url}: {e.reason}")
+            continue
+        if response.status_code != 200:
+            print(f"  [SKIP] {url}: HTTP {response.status_code}")
+            response.close()
+            continue
+        page_cache.put(url, response.text, etag=response.headers.get("ETag"),
+                       last_modified=response.headers.get("Last-Modified"))
+        if entry.get("dimensions"):
+            page_cache.set_dimensions(url, entry["dimensions"], entry.get("source"))
+        stored += 1
+    return stored
+
+
+def time_call(fn, repeat):
+    """Average seconds per call of `fn()` over `repeat` runs, and its last result."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def bench_parsers(pages, repeat):
+    """Per-page parse and extraction time for each installed HTML backend."""
+    baseline = {name: extract_dimensions_with_source(html, "html.parser") for name, html in pages}
+
+    print(f"{'backend':<12} {'parse ms':>10} {'extract ms':>11} {'median':>8} {'mismatches':>11}")
+    for backend in html_backends.available_backends():
+        parse_times = []
+        extract_times = []
+        mismatches = 0
+        for name, html in pages:
+            seconds, _ = time_call(lambda: html_backends.parse(html, backend).text(), repeat)
+            parse_times.append(seconds)
+            seconds, result = time_call(lambda: extract_dimensions_with_source(html, backend), repeat)
+            extract_times.append(seconds)
+            if result != baseline[name]:
+                mismatches += 1
+                print(f"  [MISMATCH] {backend}: {name}: {result} != {baseline[name]}")
+
+        print(f"{backend:<12} {1000 * statistics.mean(parse_times):>10.2f} "
+              f"{1000 * statistics.mean(extract_times):>11.2f} "
+              f"{1000 * statistics.median(extract_times):>8.2f} {mismatches:>11d}")
+
+
+def peak_memory(fn):
+    """Peak Python heap allocation (bytes) while running `fn()`."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_modes(pages, repeat):
+    """Targeted-region vs full-page extraction time and memory for each backend."""
+    print(f"{'backend':<12} {'mode':<9} {'ms/page':>9} {'peak KB':>9} {'same result':>12}")
+    for backend in html_backends.available_backends():
+        full = {name: extract_dimensions_with_source(html, backend, mode="full") for name, html in pages}
+        for mode in ("full", "targeted"):
+            times = []
+            peaks = []
+            same = 0
+            for name, html in pages:
+                seconds, result = time_call(lambda: extract_dimensions_with_source(html, backend, mode=mode), repeat)
+                times.append(seconds)
+                peaks.append(peak_memory(lambda: extract_dimensions_with_source(html, backend, mode=mode)))
+                same += result[0] == full[name][0]
+            print(f"{backend:<12} {mode:<9} {1000 * statistics.mean(times):>9.2f} "
+                  f"{statistics.mean(peaks) / 1024:>9.0f} {same:>6d}/{len(pages):<5d}")
+
+
+# The pattern loop extract_dimensions_reliable used before dimension_patterns,
+# one re.search pass per pattern; kept as the baseline for bench_extract
+MULTI_PASS_PATTERNS = [
+    r'(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*cm',
+    r'(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*cm',
+    r'W\s*(\d+(?:\.\d+)?)\s*x\s*D\s*(\d+(?:\.\d+)?)\s*x\s*H\s*(\d+(?:\.\d+)?)\s*cm',
+    r'Length\s*(\d+(?:\.\d+)?)\s*x\s*Width\s*(\d+(?:\.\d+)?)\s*x\s*Height\s*(\d+(?:\.\d+)?)\s*cm',
+]
+
+
+def multi_pass_extract(text):
+    """Baseline: try each pattern over the whole text in turn."""
+    if not text:
+        return "N/A"
+    for pattern in MULTI_PASS_PATTERNS:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return "x".join(match.groups()) + " cm"
+    return "N/A"
+
+
+def bench_extract(pages, repeat):
+    """Multi-pass loop vs single-pass regex, without and with the "cm" prefilter."""
+    inputs = {"page text": [html_backends.parse(html).text() for _, html in pages],
+              "raw html": [html for _, html in pages]}
+    variants = {
+        "multi-pass": multi_pass_extract,
+        "single-pass": lambda text: str(dimension_patterns.parse_dimension(text, prefilter=False) or "N/A"),
+        "prefiltered": dimension_patterns.extract_dimensions,
+    }
+    print(f"{'input':<10} {'KB/page':>8} {'windows':>8} " + " ".join(f"{name + ' ms':>15}" for name in variants)
+          + f" {'same result':>12}")
+    for label, texts in inputs.items():
+        times = {name: [] for name in variants}
+        same = 0
+        for text in texts:
+            results = set()
+            for name, extract in variants.items():
+                seconds, result = time_call(lambda: extract(text), repeat)
+                times[name].append(seconds)
+                results.add(result)
+            same += len(results) == 1
+        kb = statistics.mean(len(text) for text in texts) / 1024
+        windows = statistics.mean(len(dimension_patterns.candidate_windows(text)) for text in texts)
+        print(f"{label:<10} {kb:>8.0f} {windows:>8.1f} "
+              + " ".join(f"{1000 * statistics.mean(times[name]):>15.3f}" for name in variants)
+              + f" {same:>6d}/{len(texts):<5d}")
+
+
+def bench_pool(pages, repeat, workers):
+    """Extraction throughput of each parse_pool mode on the same pages."""
+    gil = "disabled" if parse_pool.free_threaded() else "enabled"
+    print(f"Python {platform.python_version()} (GIL {gil}), {workers} workers\n")
+    print(f"{'mode':<12} {'start s':>8} {'pages/s':>9} {'ms/page':>9} {'speedup':>8} {'same result':>12}")
+    baseline = None
+    inline_seconds = None
+    for mode in parse_pool.MODES:
+        parse_pool.configure(mode=mode, workers=workers)
+        try:
+            start = time.perf_counter()
+            if mode != "inline":  # start the workers (and their imports) before timing
+                for future in [parse_pool.submit(pages[0][1]) for _ in range(workers)]:
+                    future.result()
+            startup = time.perf_counter() - start
+            if parse_pool.PARSE_MODE != mode:
+                print(f"{mode:<12} unavailable ({parse_pool.fallback_reason()})")
+                continue
+            start = time.perf_counter()
+            for _ in range(repeat):
+                if mode == "inline":
+                    results = [parse_pool.extract(html) for _, html in pages]
+                else:
+                    futures = [parse_pool.submit(html) for _, html in pages]
+                    results = [parse_pool.finish_job(future.result()) for future in futures]
+            seconds = (time.perf_counter() - start) / repeat
+        finally:
+            parse_pool.shutdown()
+        if baseline is None:
+            baseline, inline_seconds = results, seconds
+        same = sum(a == b for a, b in zip(results, baseline))
+        print(f"{mode:<12} {startup:>8.2f} {len(pages) / seconds:>9.1f} {1000 * seconds / len(pages):>9.2f} "
+              f"{inline_seconds / seconds:>7.2f}x {same:>6d}/{len(pages):<5d}")
+
+
+def catalog_rows(count):
+    """split_output products as finisher's raw rows, repeated to `count` rows."""
+    rows = []
+    for path in sorted((Path(__file__).parent / "split_output").glob("*.json")):
+        if "combined" in path.name:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for product in (data if isinstance(data, list) else data.get("products", [])):
+            rows.append((product.get("Product Name", ""), product.get("Dimensions", ""),
+                         product.get("Price", ""), "", path.stem, product.get("Product URL", "")))
+    return [rows[i % len(rows)] for i in range(count)] if rows else []
+
+
+def per_row_products(rows):
+    """Baseline: finisher's row-at-a-time normalization."""
+    products = []
+    for name, dim, price, type_name, subtype, url in rows:
+        name = finisher.clean_text(name)
+        if not name:
+            continue
+        products.append({"ID": f"I-{len(products) + 1:04d}", "Name": name, "Dimension": finisher.clean_dimension(dim),
+                         "Price": price, "Type": type_name, "SubType": subtype, "Brand": "IKEA",
+                         "ProductURL": finisher.clean_text(url)})
+    return products
+
+
+def bench_finish(row_count, repeat):
+    """Per-row vs column-wise (finisher.build_products) catalog normalization."""
+    rows = catalog_rows(row_count)
+    if not rows:
+        raise SystemExit("No split_output files to build a catalog from")
+    per_row_seconds, per_row = time_call(lambda: per_row_products(rows), repeat)
+    bulk_seconds, bulk = time_call(lambda: [p for p in finisher.build_products(rows) if p is not None], repeat)
+    print(f"{'rows':>8} {'per-row s':>10} {'column-wise s':>14} {'speedup':>8} {'same output':>12}")
+    print(f"{len(rows):>8d} {per_row_seconds:>10.3f} {bulk_seconds:>14.3f} "
+          f"{per_row_seconds / bulk_seconds:>7.1f}x {str(per_row == bulk):>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dimension extraction on saved product pages")
+    parser.add_argument("--pages", type=str, default=None, help="Directory of saved .html pages (default: page cache)")
+    parser.add_argument("--fetch-partial", action="store_true",
+                        help="First re-download in full the cached pages that streaming cut short")
+    parser.add_argument("--limit", type=int, default=None, help="Use at most N pages")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per page per measurement")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+    sub.add_parser("parsers", help="Compare HTML parser backends")
+    sub.add_parser("modes", help="Compare targeted-region and full-page extraction")
+    sub.add_parser("extract", help="Compare the multi-pass, single-pass and prefiltered dimension regexes")
+    pool = sub.add_parser("pool", help="Compare the inline, thread, process and interpreter parse modes")
+    pool.add_argument("--workers", type=int, default=parse_pool.PARSE_WORKERS, help="Parse workers per pool")
+    finish = sub.add_parser("finish", help="Compare per-row and column-wise catalog normalization")
+    finish.add_argument("--rows", type=int, default=300_000, help="Catalog size in rows")
+
+    args = parser.parse_args()
+    # Fixed strategy order, and keep these runs out of the stats scraping runs learn from
+    strategy_stats.configure(adaptive=False, stats_file=Path(tempfile.mkdtemp(prefix="benchmark-")) / "strategy_stats.json")
+
+    if args.benchmark == "finish":
+        bench_finish(args.rows, args.repeat)
+        raise SystemExit
+
+    if args.fetch_partial and not args.pages:
+        print(f"Downloaded {fetch_partial_pages(args.limit)} partially cached pages in full")
+    pages = load_pages(args.pages, args.limit)
+    if not args.pages:
+        partial = sum(1 for _ in page_cache.partial_entries())
+        if partial and not args.fetch_partial:
+            print(f"Skipping {partial} partially cached pages (pass --fetch-partial to download them in full)")
+    if not pages:
+        raise SystemExit("No saved pages found (run a scrape first or pass --pages DIR)")
+    print(f"Benchmarking on {len(pages)} pages, {args.repeat} run(s) each\n")
+
+    if args.benchmark == "parsers":
+        bench_parsers(pages, args.repeat)
+    elif args.benchmark == "modes":
+        bench_modes(pages, args.repeat)
+    elif args.benchmark == "extract":
+        bench_extract(pages, args.repeat)
+    elif args.benchmark == "pool":
+        bench_pool(pages, args.repeat, args.workers)
@@ -0,0 +1,327 @@
+"""Shared dimension extraction: one compiled regex, one scan per text.
+
+Every dimension form the scripts understand is a branch of DIMENSION_RE, with
+its own named groups:
+
+    "90x200x50 cm" / "39x30 cm" / "75 cm"        x1, x2, x3
+    "W 80 x D 28 x H 202 cm"                      x1, d, h
+    "Length 10 x Width 20 x Height 30 cm"         x1, width, height
+
+A single `finditer` pass over the text yields every candidate; the callers
+differ only in which candidate they keep. What they keep is parsed into a
+`Dimension` (numbers in cm), which is formatted canonically only when it is
+written out (see `dimension_text` / `read_dimension`).
+
+Every form ends in "cm", so that is the one anchor the prefilter needs: the
+text is searched for "cm" with a plain substring search, and the regex only
+runs over the WINDOW_CHARS before each hit (see `candidate_windows`). Cost
+then grows with the number of "cm"s on a page rather than with its length.
+
+All branches start at the first number, so the regex engine only tries
+positions that hold a digit; the "W" / "Length" label in front of a labelled
+form is checked on the (rare) matches instead, and the search resumes inside
+a match that lacks it. Quantifiers are possessive where backtracking can
+never lead to a match.
+
+Short texts (listing descriptions, product names) repeat a lot across a
+catalog, so their results are memoized in an LRU keyed by the text with its
+whitespace collapsed and case folded, which never changes what the regex finds.
+"""
+import functools
+import re
+import sys
+import threading
+
+# Possessive quantifiers need Python 3.11; older versions get the plain (slower) ones
+_P = "+" if sys.version_info >= (3, 11) else ""
+_NUMBER = rf"\d+{_P}(?:\.\d+)?{_P}"
+_S = rf"\s*{_P}"
+
+DIMENSION_RE = re.compile(
+    rf"""
+    (?P<x1>{_NUMBER}){_S}
+    (?:
+        cm
+      | x{_S}
+        (?:
+            (?P<x2>{_NUMBER})(?:{_S}x{_S}(?P<x3>{_NUMBER}))?{_S}cm
+          | D{_S}(?P<d>{_NUMBER}){_S}x{_S}H{_S}(?P<h>{_NUMBER}){_S}cm
+          | Width{_S}(?P<width>{_NUMBER}){_S}x{_S}Height{_S}(?P<height>{_NUMBER}){_S}cm
+        )
+    )
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Longest dimension text the prefilter allows for (from first digit to "cm")
+WINDOW_CHARS = 160
+
+# Memo bounds: texts longer than MEMO_MAX_TEXT (whole pages) are never memoized,
+# and each LRU level keeps at most MEMO_MAX_ENTRIES texts, so a memo holds at
+# most 2 * MEMO_MAX_ENTRIES * MEMO_MAX_TEXT characters of keys
+MEMO_MAX_ENTRIES = 20_000
+MEMO_MAX_TEXT = 500
+
+# Preference between forms when a text has several, best first (see `_rank`)
+THREE_D, TWO_D, W_D_H, LENGTH_WIDTH_HEIGHT, SINGLE = range(5)
+
+
+def _label_before(text, start, label):
+    """True if `label` (any case) ends right before `start`, whitespace aside."""
+    end = start
+    while end > 0 and text[end - 1].isspace():
+        end -= 1
+    return text[max(0, end - len(label)):end].lower() == label
+
+
+def _rank(match):
+    """Form of `match` (THREE_D ... SINGLE) and its numbers, or (None, None) if it is not one."""
+    x1, x2, x3 = match.group("x1", "x2", "x3")
+    if x3 is not None:
+        return THREE_D, (x1, x2, x3)
+    if x2 is not None:
+        return TWO_D, (x1, x2)
+    if match.group("d") is not None:
+        if _label_before(match.string, match.start(), "w"):
+            return W_D_H, (x1,) + match.group("d", "h")
+        return None, None
+    if match.group("width") is not None:
+        if _label_before(match.string, match.start(), "length"):
+            return LENGTH_WIDTH_HEIGHT, (x1,) + match.group("width", "height")
+        return None, None
+    return SINGLE, (x1,)
+
+
+def _anchor_positions(text):
+    """Start of every "cm" (any case) in `text`."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        anchors, haystack = ("cm",), lowered
+    else:  # a few characters lower-case to two; search the original text instead
+        anchors, haystack = ("cm", "CM", "Cm", "cM"), text
+    positions = []
+    for anchor in anchors:
+        position = haystack.find(anchor)
+        while position >= 0:
+            positions.append(position)
+            position = haystack.find(anchor, position + 2)
+    positions.sort()
+    return positions
+
+
+def candidate_windows(text, window=WINDOW_CHARS):
+    """(start, end) spans of `text` that can hold a dimension, in order and not overlapping.
+
+    Each span runs from `window` characters before a "cm" to just past it; a
+    start that would split a number is moved back to the number's first digit.
+    """
+    windows = []
+    for position in _anchor_positions(text):
+        start, end = max(0, position - window), position + 2
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = end
+            continue
+        while start > 0 and (text[start - 1].isdecimal() or text[start - 1] == "."):
+            start -= 1
+        windows.append([start, end])
+    return windows
+
+
+def _ranked(text, prefilter=True):
+    """(form, numbers) of each dimension in `text`, only looking inside candidate windows if `prefilter`.
+
+    A "D ... x H" or "Width ... x Height" match without its label is not a
+    dimension, but it must not hide one inside it ("80 x D 28 x H 202 cm"
+    still holds "202 cm"), so the search resumes right after its first number.
+    """
+    if not prefilter or len(text) <= WINDOW_CHARS:
+        spans = [(0, len(text))]
+    else:
+        spans = candidate_windows(text)
+    for start, end in spans:
+        match = DIMENSION_RE.search(text, start, end)
+        while match is not None:
+            rank, numbers = _rank(match)
+            if rank is None:
+                match = DIMENSION_RE.search(text, match.end("x1"), end)
+                continue
+            yield rank, numbers
+            match = DIMENSION_RE.search(text, match.end(), end)
+
+
+def find_dimensions(text, prefilter=True):
+    """(form, numbers) of the best dimension in `text`, numbers as strings, or None.
+
+    Any "AxBxC cm" wins, then "AxB cm", then "W A x D B x H C cm", then
+    "Length A x Width B x Height C cm"; the first one of the best form found
+    is used. Lone "75 cm" values are not dimensions here.
+    """
+    if not text:
+        return None
+    best = None
+    for rank, numbers in _ranked(text, prefilter):
+        if rank == THREE_D:
+            return rank, numbers
+        if rank < (best[0] if best else SINGLE):
+            best = rank, numbers
+    return best
+
+
+def first_measurement(text):
+    """(form, numbers) of the first measurement in `text` (lone "75 cm" values included), or None."""
+    if not text:
+        return None
+    return next(_ranked(text), None)
+
+
+class LRUMemo:
+    """LRU cache of `fn(text)` for short texts, keyed by the normalized text.
+
+    Two functools.lru_cache levels: the raw text (so a repeat costs one dict
+    lookup) in front of the normalized text (so "37x28 CM" and "37x28  cm"
+    share an entry). Each level holds at most `max_entries` texts. lru_cache
+    is thread-safe; the bypass counter has its own lock.
+    """
+
+    def __init__(self, fn, max_entries=None, max_text=None):
+        self.fn = fn
+        self.max_text = max_text or MEMO_MAX_TEXT
+        self.bypassed = 0
+        self._lock = threading.Lock()
+        self._normalized = functools.lru_cache(max_entries or MEMO_MAX_ENTRIES)(fn)
+        self._raw = functools.lru_cache(max_entries or MEMO_MAX_ENTRIES)(self._lookup_normalized)
+
+    def _lookup_normalized(self, text):
+        return self._normalized(" ".join(text.split()).lower())
+
+    def __call__(self, text):
+        if not text or len(text) > self.max_text:
+            with self._lock:
+                self.bypassed += 1
+            return self.fn(text)
+        return self._raw(text)
+
+    def stats(self):
+        raw = self._raw.cache_info()
+        normalized = self._normalized.cache_info()
+        return {"hits": raw.hits + normalized.hits, "misses": normalized.misses,
+                "bypassed": self.bypassed, "entries": normalized.currsize}
+
+    def clear(self):
+        self._raw.cache_clear()
+        self._normalized.cache_clear()
+        with self._lock:
+            self.bypassed = 0
+
+
+_best_memo = LRUMemo(find_dimensions)
+_first_memo = LRUMemo(first_measurement)
+
+
+def memo_stats():
+    """Counters of the parse_dimension and first_dimension memos, summed."""
+    totals = {"hits": 0, "misses": 0, "bypassed": 0, "entries": 0}
+    for memo in (_best_memo, _first_memo):
+        for key, value in memo.stats().items():
+            totals[key] += value
+    return totals
+
+
+def describe_memo_stats():
+    """One-line memo summary for run summaries."""
+    s = memo_stats()
+    lookups = s["hits"] + s["misses"]
+    rate = 100 * s["hits"] / lookups if lookups else 0
+    return (f"{s['hits']} hits, {s['misses']} misses ({rate:.1f}% hit rate), "
+            f"{s['entries']} cached texts, {s['bypassed']} long texts not memoized")
+
+
+def _number_text(value):
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+# Axis of each number, by form; unlabelled sizes follow IKEA's width x depth x height order
+FORM_AXES = {
+    THREE_D: ("width", "depth", "height"),
+    TWO_D: ("width", "depth"),
+    W_D_H: ("width", "depth", "height"),
+    LENGTH_WIDTH_HEIGHT: ("length", "width", "height"),
+    SINGLE: (None,),
+}
+
+
+class Dimension:
+    """A product size in cm: its sizes in the order the text wrote them, and their axes.
+
+    "80x28x202 cm" and "W 80 x D 28 x H 202 cm" are width 80, depth 28,
+    height 202; "Length 10 x Width 20 x Height 30 cm" is length 10, width 20,
+    height 30. A lone "75 cm" has no known axis, so all four are None.
+    """
+
+    __slots__ = ("sizes", "axes")
+
+    def __init__(self, sizes, axes=None):
+        self.sizes = tuple(float(v) for v in sizes)
+        self.axes = tuple(axes) if axes is not None else (None,) * len(self.sizes)
+
+    @classmethod
+    def from_match(cls, form, numbers):
+        """Build from the (form, numbers) find_dimensions/first_measurement return."""
+        return cls(numbers, FORM_AXES[form])
+
+    def axis(self, name):
+        """Size along axis `name` ("width", "depth", "height", "length"), or None."""
+        for axis, size in zip(self.axes, self.sizes):
+            if axis == name:
+                return size
+        return None
+
+    width = property(lambda self: self.axis("width"))
+    depth = property(lambda self: self.axis("depth"))
+    height = property(lambda self: self.axis("height"))
+    length = property(lambda self: self.axis("length"))
+
+    def format(self, unit=" cm"):
+        """Canonical text form, e.g. "80x28x202 cm" (or "80x28x202cm" with unit="cm")."""
+        return "x".join(_number_text(v) for v in self.sizes) + unit
+
+    def __str__(self):
+        return self.format()
+
+    def __repr__(self):
+        sizes = ", ".join(f"{axis}={_number_text(v)}" if axis else _number_text(v)
+                          for axis, v in zip(self.axes, self.sizes))
+        return f"Dimension({sizes})"
+
+    def __eq__(self, other):
+        return isinstance(other, Dimension) and (self.sizes, self.axes) == (other.sizes, other.axes)
+
+    def __hash__(self):
+        return hash((self.sizes, self.axes))
+
+
+def parse_dimension(text, prefilter=True):
+    """Best dimension in `text` (see find_dimensions) as a Dimension, or None."""
+    found = _best_memo(text) if prefilter else find_dimensions(text, prefilter=False)
+    return Dimension.from_match(*found) if found else None
+
+
+def first_dimension(text):
+    """First measurement in `text` (see first_measurement) as a Dimension, or None."""
+    found = _first_memo(text)
+    return Dimension.from_match(*found) if found else None
+
+
+def dimension_text(dimension, unit=" cm"):
+    """`dimension` as it is written to files and stores ("80x28x202 cm"), or "N/A" for None."""
+    return dimension.format(unit) if dimension is not None else "N/A"
+
+
+def read_dimension(text):
+    """The Dimension in text written by dimension_text (or any dimension text), or None."""
+    return parse_dimension(text) if isinstance(text, str) and text != "N/A" else None
+
+
+def extract_dimensions(text, unit=" cm"):
+    """Best dimension in `text` formatted as "AxBxC cm" (or with `unit`), else "N/A"."""
+    return dimension_text(parse_dimension(text), unit)
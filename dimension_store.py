@@ -0,0 +1,76 @@
+"""Persistent store of extracted dimensions keyed by IKEA article number.
+
+Maps article number -> {"url", "dimensions", "source", "fetched_at"} so the
+finishing scripts can answer from disk instantly instead of re-scraping.
+Entries older than TTL_SECONDS are stale: still served, but queued for a
+background refresh (stale-while-revalidate).
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from page_cache import cache_key
+
+STORE_FILE = Path(__file__).parent / "dimension_store.json"
+TTL_SECONDS = 7 * 24 * 3600
+# Stale entries refreshed in the background per run by default
+DEFAULT_REFRESH_BUDGET = 50
+
+_lock = threading.Lock()
+_entries = None
+_dirty = False
+
+
+def _load():
+    global _entries
+    if _entries is None:
+        try:
+            with open(STORE_FILE, "r", encoding="utf-8") as f:
+                _entries = json.load(f)
+        except (OSError, ValueError):
+            _entries = {}
+    return _entries
+
+
+def lookup(url):
+    """Return the stored entry for `url`, or None."""
+    with _lock:
+        entry = _load().get(cache_key(url))
+        return dict(entry) if entry else None
+
+
+def is_fresh(entry):
+    """True when `entry` is younger than TTL_SECONDS."""
+    return time.time() - entry.get("fetched_at", 0) <= TTL_SECONDS
+
+
+def record(url, dimensions, source=None):
+    """Store the dimension extracted for `url` and the strategy that found it."""
+    global _dirty
+    with _lock:
+        _load()[cache_key(url)] = {
+            "url": url,
+            "dimensions": dimensions,
+            "source": source,
+            "fetched_at": time.time(),
+        }
+        _dirty = True
+
+
+def save():
+    """Write the store to disk if anything changed."""
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        tmp = STORE_FILE.with_name(STORE_FILE.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_entries, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, STORE_FILE)
+        _dirty = False
+
+
+atexit.register(save)
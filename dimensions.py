@@ -1,90 +1,541 @@
+import asyncio
+from collections import namedtuple
 import json
 import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import time
 import re
+import threading
+import time
+from urllib.parse import urlsplit
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-}
+import dimension_patterns
+import dimension_store
+import fetch_policy
+import html_backends
+import http_client
+import hydration
+import journal
+import page_cache
+import page_regions
+import parse_pool
+import rate_limit
+import singleflight
+import strategy_stats
+import stream_fetch
+import work_plan
+from dimension_patterns import dimension_text, read_dimension
+from http_client import HEADERS
+
+# Default number of product pages fetched at once by scrape_dimensions_many
+DEFAULT_CONCURRENCY = 8
+
+# Outcome of scraping one product page. `status` is FOUND, NO_DIMENSIONS (the page
+# was fetched but has none), GONE (a permanent client error such as 404: the product
+# was removed, not worth re-fetching) or FAILED (network/server or parse error,
+# worth re-fetching). `dimension` is a dimension_patterns.Dimension, or None.
+ScrapeResult = namedtuple("ScrapeResult", "url status dimension source error")
+FOUND = "found"
+NO_DIMENSIONS = "no_dimensions"
+GONE = "gone"
+FAILED = "failed"
+
+# "targeted": parse only the product-information regions first, falling back to
+# the whole page when they yield nothing; "full": always parse the whole page
+EXTRACTION_MODE = "targeted"
+
+# Strategy 3 looks at these elements when their class suggests a measurement block
+INFO_SECTION_TAGS = ("div", "span", "p")
+INFO_SECTION_CLASS = re.compile("measure|dimension|size|spec", re.I)
+
+# Concurrent scrapes of the same product (by article number) share one fetch and parse
+_in_flight = singleflight.Group()
+# The same for fetches alone, when pages are parsed on the parse pool (see scrape_results_async)
+_fetches_in_flight = singleflight.Group()
+
+def extract_dimension(text):
+    """Parse the best dimension in `text` into a Dimension, or None
+
+    All the patterns are matched in one scan (see dimension_patterns).
+    """
+    return dimension_patterns.parse_dimension(text)
 
 def extract_dimensions_reliable(text):
-    """Extract clean dimensions from text using multiple strategies"""
-    if not text:
-        return "N/A"
-    
-    # Strategy 1: Look for standard dimension patterns (e.g., 39x30 cm, 90x200x50 cm)
-    patterns = [
-        r'(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*cm',  # 3D
-        r'(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*cm',  # 2D
-        r'W\s*(\d+(?:\.\d+)?)\s*x\s*D\s*(\d+(?:\.\d+)?)\s*x\s*H\s*(\d+(?:\.\d+)?)\s*cm',  # W x D x H
-        r'Length\s*(\d+(?:\.\d+)?)\s*x\s*Width\s*(\d+(?:\.\d+)?)\s*x\s*Height\s*(\d+(?:\.\d+)?)\s*cm',
+    """Extract clean dimensions from text as "AxBxC cm", or "N/A" (see extract_dimension)"""
+    return dimension_patterns.extract_dimensions(text)
+
+def slug_text(url):
+    """Turn the last path segment of a product or image URL into searchable text
+
+    e.g. ".../billy-bookcase-white-80x28x202-cm-00263850/" -> "billy bookcase white 80x28x202 cm 00263850"
+    """
+    if not url:
+        return ""
+    segment = urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+    # Image file names look like <slug>__<image id>_<pe id>_s5.jpg
+    segment = re.sub(r"\.(?:jpe?g|png|webp|avif)$", "", segment.split("__", 1)[0], flags=re.I)
+    return segment.replace("-", " ")
+
+def listing_dimensions(product):
+    """Extract dimensions from a product's listing-level fields, without fetching its page
+
+    Tries the listing description (the Node scraper's Dimensions text), the product
+    name, then the image and product URL slugs. Returns (Dimension or None, source).
+    """
+    candidates = [
+        ("listing_text", product.get("Dimensions") or product.get("dimension") or product.get("Dimension")),
+        ("listing_name", product.get("Product Name")),
+        ("image_slug", slug_text(product.get("Image URL"))),
+        ("url_slug", slug_text(product.get("Product URL") or product.get("ProductURL") or product.get("url"))),
     ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            groups = match.groups()
-            if len(groups) == 3 and groups[2]:
-                return f"{groups[0]}x{groups[1]}x{groups[2]} cm"
-            elif len(groups) >= 2:
-                return f"{groups[0]}x{groups[1]} cm"
-    
-    return "N/A"
+    for source, text in candidates:
+        if isinstance(text, str) and text and text != "N/A":
+            dimension = extract_dimension(text)
+            if dimension is not None:
+                return dimension, source
+    return None, None
 
-def scrape_dimensions(url):
-    """Scrape dimensions from IKEA product page with multiple fallback strategies"""
+def _snippet_dimensions(kind, snippet):
+    """Extract (Dimension or None, source) from one RegionScanner snippet while streaming"""
+    if kind == "region":
+        return extract_dimension(html_backends.parse(snippet).text()), "measurement_region"
+    if kind == "meta":
+        return extract_dimension(snippet), "meta_description"
+    return json_ld_dimensions(snippet), "json_ld"
+
+class _SnippetTally:
+    """_snippet_dimensions for one streamed page, timing each strategy it stands in for"""
+
+    def __init__(self):
+        self.tries = {}  # strategy name -> [seconds, hit]
+
+    def extract(self, kind, snippet):
+        start = time.perf_counter()
+        dimension, source = _snippet_dimensions(kind, snippet)
+        entry = self.tries.setdefault(source, [0.0, False])
+        entry[0] += time.perf_counter() - start
+        entry[1] = entry[1] or dimension is not None
+        return dimension, source
+
+    def record(self):
+        for name, (seconds, hit) in self.tries.items():
+            strategy_stats.record("streamed", name, hit, seconds)
+
+def fetch_page(url):
+    """Return (html, known) for a product page, using the on-disk page cache.
+
+    Fresh cache entries are served from disk. Stale ones are revalidated with
+    If-None-Match / If-Modified-Since, and a 304 keeps the cached body. When the
+    cached body was already parsed on an earlier run, `known` is the stored
+    (Dimension or None, source) pair and html is None so the page is not parsed again.
+    Downloads are streamed (see stream_fetch) and stop once a conclusive dimension
+    is found, in which case `known` is that result and html is None as well.
+    """
+    streaming = stream_fetch.STREAMING
+    entry = page_cache.lookup(url)
+    if entry is not None and entry.get("partial") and not stream_fetch.conclusive(read_dimension(entry.get("dimensions"))):
+        # Cut short on a dimension streaming no longer stops for: fetch it in full
+        entry = None
+    response = None
+    if entry is not None and not page_cache.is_fresh(entry):
+        response = fetch_policy.get(url, headers=page_cache.validators(entry), timeout=15, stream=streaming)
+        if response.status_code == 304:
+            response.close()
+            entry = page_cache.mark_revalidated(url, entry)
+            response = None
+        else:
+            entry = None
+
+    if entry is not None:
+        known = (read_dimension(entry["dimensions"]), entry.get("source")) if entry.get("dimensions") else None
+        html = None if known or entry.get("partial") else page_cache.read_body(entry)
+        if known or html is not None:
+            page_cache.record("hits")
+            page_cache.record("bytes_saved", entry.get("size", 0))
+            return html, known
+
+    if response is None:
+        response = fetch_policy.get(url, timeout=15, stream=streaming)
     try:
-        response = requests.get(url, headers=HEADERS, timeout=15)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Strategy 1: Look in all text for dimension patterns
-        page_text = soup.get_text()
-        dimensions = extract_dimensions_reliable(page_text)
-        
-        if dimensions != "N/A":
-            return dimensions
-        
-        # Strategy 2: Check meta tags
-        meta_desc = soup.find("meta", {"name": "description"})
-        if meta_desc and meta_desc.get("content"):
-            dimensions = extract_dimensions_reliable(meta_desc.get("content"))
-            if dimensions != "N/A":
-                return dimensions
-        
-        # Strategy 3: Look in specific product info sections
-        info_sections = soup.find_all(["div", "span", "p"], {"class": re.compile("measure|dimension|size|spec", re.I)})
-        for section in info_sections[:5]:  # Check first 5 matching sections
-            dimensions = extract_dimensions_reliable(section.get_text())
-            if dimensions != "N/A":
-                return dimensions
-        
-        # Strategy 4: Check JSON-LD structured data
-        json_ld = soup.find("script", {"type": "application/ld+json"})
-        if json_ld:
+    except requests.HTTPError:
+        response.close()
+        raise
+    page_cache.record("misses")
+    validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+    if not streaming:
+        page_cache.put(url, response.text, **validators)
+        return response.text, None
+
+    tally = _SnippetTally()
+    html, known = stream_fetch.read_until_dimensions(response, tally.extract)
+    page_cache.put(url, html, partial=known is not None, **validators)
+    if known:
+        # Snippets are tried in page order, not the targeted one, so they are
+        # counted apart (pages read in full are counted when parsed)
+        tally.record()
+        page_cache.set_dimensions(url, dimension_text(known[0]), known[1])
+        return None, known
+    return html, None
+
+def scrape_dimensions_result(url):
+    """Scrape one product page and return a ScrapeResult
+
+    Retries and circuit breaking happen in `fetch_policy`; only pages that were
+    actually fetched and parsed are recorded in the dimension store. Concurrent
+    calls for the same product are coalesced into one fetch.
+    """
+    result = _in_flight.do(page_cache.cache_key(url), _scrape_one, url)
+    return result._replace(url=url)
+
+def coalesced_count():
+    """Number of scrapes that were served by another in-flight scrape"""
+    return _in_flight.coalesced + _fetches_in_flight.coalesced
+
+def describe_run_stats():
+    """Summary lines ("HTTP: ...", "Cache: ...") of every scraping layer, for the end of a run"""
+    return [
+        f"HTTP: {http_client.describe_connection_stats()}",
+        f"Retries: {fetch_policy.describe_stats()}",
+        f"Coalesced: {coalesced_count()} duplicate in-flight requests shared a fetch",
+        f"Cache: {page_cache.describe_stats()}",
+        f"Streaming: {stream_fetch.describe_stats()}",
+        f"Parsing: {parse_pool.describe_stats()}",
+        f"Strategies: {strategy_stats.describe_stats()}",
+        f"Journal: {journal.describe_stats()}",
+    ]
+
+def _fetch_one(url):
+    """fetch_page(url), or a GONE / FAILED ScrapeResult if the page could not be fetched
+
+    Only network and HTTP errors become results; anything else (a bug, a disk
+    error in the page cache) propagates. A GONE page is recorded in the
+    dimension store as having no dimensions, so it is not fetched again until
+    its entry goes stale.
+    """
+    try:
+        return fetch_page(url)
+    except requests.HTTPError as e:
+        if e.response is None or not fetch_policy.is_permanent(e.response.status_code):
+            return ScrapeResult(url, FAILED, None, None, str(e))
+        dimension_store.record(url, "N/A", None)
+        return ScrapeResult(url, GONE, None, None, f"HTTP {e.response.status_code}")
+    except (fetch_policy.FetchError, requests.RequestException) as e:
+        return ScrapeResult(url, FAILED, None, None, str(e))
+
+def fetch_page_result(url):
+    """(html, known) as from fetch_page, or a GONE / FAILED ScrapeResult (see _fetch_one)
+
+    For callers that parse pages themselves: concurrent fetches of the same
+    product are coalesced, and finish_result stores what the parse found.
+    """
+    fetched = _fetches_in_flight.do(page_cache.cache_key(url), _fetch_one, url)
+    return fetched._replace(url=url) if isinstance(fetched, ScrapeResult) else fetched
+
+def finish_result(url, known, parsed):
+    """Store a page's (Dimension or None, source) and return its ScrapeResult
+
+    `parsed` is True when `known` came from parsing the page rather than from
+    fetch_page, so it is also saved in the page cache.
+    """
+    dimension, source = known
+    if parsed:
+        page_cache.set_dimensions(url, dimension_text(dimension), source)
+    dimension_store.record(url, dimension_text(dimension), source)
+    status = FOUND if dimension is not None else NO_DIMENSIONS
+    return ScrapeResult(url, status, dimension, source, None)
+
+def parse_failed(url, error):
+    """FAILED ScrapeResult for a page that was fetched but could not be parsed"""
+    return ScrapeResult(url, FAILED, None, None, f"parse error: {type(error).__name__}: {error}")
+
+def _scrape_one(url):
+    fetched = _fetch_one(url)
+    if isinstance(fetched, ScrapeResult):
+        return fetched
+    html, known = fetched
+    if known is not None:
+        return finish_result(url, known, parsed=False)
+    try:
+        known = parse_pool.extract(html)
+    except Exception as e:
+        return parse_failed(url, e)
+    return finish_result(url, known, parsed=True)
+
+def scrape_dimensions(url):
+    """Scrape dimensions from IKEA product page with multiple fallback strategies
+
+    Returns "N/A" both when the page has no dimensions and when it could not be
+    fetched; use scrape_dimensions_result to tell the two apart.
+    """
+    return dimension_text(scrape_dimensions_result(url).dimension)
+
+def extract_dimensions_from_html(html):
+    """Extract dimensions from product page HTML with multiple fallback strategies"""
+    return dimension_text(extract_dimensions_with_source(html)[0])
+
+def json_ld_dimensions(json_ld):
+    """Extract a Dimension (or None) from the top-level keys of one JSON-LD script body"""
+    try:
+        data = json.loads(json_ld)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    # Look for dimension info in various places
+    for key in ["width", "height", "depth", "dimensions", "specs"]:
+        if key in data:
+            dimension = extract_dimension(str(data[key]))
+            if dimension is not None:
+                return dimension
+    return None
+
+def hydration_dimensions(html):
+    """Extract a Dimension (or None) from the measurement fields of a page's embedded JSON"""
+    for text in hydration.measurement_texts(html):
+        dimension = extract_dimension(text)
+        if dimension is not None:
+            return dimension
+    return None
+
+def _hydration_strategy(html, backend):
+    return hydration_dimensions(html)
+
+def _region_strategy(html, backend):
+    for region in page_regions.region_slices(html, limit=5):
+        dimension = extract_dimension(html_backends.parse(region, backend).text())
+        if dimension is not None:
+            return dimension
+    return None
+
+def _raw_meta_strategy(html, backend):
+    return extract_dimension(page_regions.meta_description(html))
+
+def _raw_json_ld_strategy(html, backend):
+    for json_ld in page_regions.json_ld_scripts(html)[:1]:
+        return json_ld_dimensions(json_ld)
+    return None
+
+def _page_text_strategy(doc):
+    # Strategy 1: Look in all text for dimension patterns
+    return extract_dimension(doc.text())
+
+def _meta_strategy(doc):
+    # Strategy 2: Check meta tags
+    return extract_dimension(doc.meta_description())
+
+def _info_sections_strategy(doc):
+    # Strategy 3: Look in specific product info sections
+    for section_text in doc.class_sections(INFO_SECTION_TAGS, INFO_SECTION_CLASS, limit=5):  # Check first 5 matching sections
+        dimension = extract_dimension(section_text)
+        if dimension is not None:
+            return dimension
+    return None
+
+def _json_ld_strategy(doc):
+    # Strategy 4: Check JSON-LD structured data
+    json_ld = doc.json_ld()
+    return json_ld_dimensions(json_ld) if json_ld else None
+
+# Extraction strategies by source name, in default order. strategy_stats reorders
+# them from hit rates and costs saved by earlier runs, within their tier.
+TARGETED_STRATEGIES = {
+    "hydration_json": _hydration_strategy,
+    "measurement_region": _region_strategy,
+    "meta_description": _raw_meta_strategy,
+    "json_ld": _raw_json_ld_strategy,
+}
+FULL_STRATEGIES = {
+    "page_text": _page_text_strategy,
+    "meta_description": _meta_strategy,
+    "info_sections": _info_sections_strategy,
+    "json_ld": _json_ld_strategy,
+}
+# Strategies grouped by how complete their dimensions are, best first: the embedded
+# JSON and measurement block give W x D x H where the meta description and JSON-LD
+# often give only two sizes, and the page text includes the measurement block
+TARGETED_TIERS = (("hydration_json", "measurement_region"), ("meta_description", "json_ld"))
+FULL_TIERS = (("page_text",), ("meta_description", "info_sections", "json_ld"))
+
+def _run_strategies(stage, strategies, tiers, *args):
+    """Try `strategies` in adaptive order within `tiers`, recording each one's hit and cost"""
+    for name in strategy_stats.order(stage, tiers):
+        start = time.perf_counter()
+        dimension = strategies[name](*args)
+        strategy_stats.record(stage, name, dimension is not None, time.perf_counter() - start)
+        if dimension is not None:
+            return dimension, name
+    return None, None
+
+def extract_dimensions_targeted(html, backend=None):
+    """Extract dimensions from the product-information regions of a page only
+
+    The embedded hydration JSON (see hydration), the measurement / product-info
+    elements, meta description and JSON-LD are located without parsing the page
+    (see page_regions), and only those slices are parsed.
+    Returns (Dimension, strategy name), or (None, None) if none of them match.
+    """
+    return _run_strategies("targeted", TARGETED_STRATEGIES, TARGETED_TIERS, html, backend)
+
+def extract_dimensions_with_source(html, backend=None, mode=None):
+    """Like extract_dimensions_from_html, but returns (Dimension or None, strategy name)
+
+    `backend` picks the HTML parser (see html_backends); default is the configured one.
+    In "targeted" mode (the default, see EXTRACTION_MODE) only the product regions
+    are parsed first, and the full page is parsed only when they yield nothing.
+    """
+    if (mode or EXTRACTION_MODE) == "targeted":
+        dimension, source = extract_dimensions_targeted(html, backend)
+        if dimension is not None:
+            return dimension, source
+    
+    return _run_strategies("full", FULL_STRATEGIES, FULL_TIERS, html_backends.parse(html, backend))
+
+
+async def scrape_results_async(urls, concurrency=DEFAULT_CONCURRENCY):
+    """Async generator yielding a ScrapeResult as each page fetch completes.
+
+    Fetches are blocking, so they run on a dedicated thread pool; the semaphore
+    caps how many pages are in flight at once across the whole call.
+    Politeness is handled per host by the shared rate limiter in `http_client`.
+
+    Unless parse_pool is in "inline" mode, downloaded pages go through a bounded
+    queue to the parse pool instead of being parsed on the fetch threads. A
+    fetch keeps its semaphore slot until its page is queued, so when parsing
+    falls behind the queue fills up and fetching slows down to match.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scrape")
+    pipelined = parse_pool.executor() is not None
+    parse_queue = asyncio.Queue(maxsize=parse_pool.QUEUE_SIZE)
+
+    async def parser():
+        while True:
+            html, parsed = await parse_queue.get()
             try:
-                data = json.loads(json_ld.string)
-                # Look for dimension info in various places
-                for key in ["width", "height", "depth", "dimensions", "specs"]:
-                    if key in data:
-                        dimensions = extract_dimensions_reliable(str(data[key]))
-                        if dimensions != "N/A":
-                            return dimensions
-            except:
-                pass
-        
-        return "N/A"
-        
-    except requests.exceptions.Timeout:
-        return "N/A"
-    except requests.RequestException:
-        return "N/A"
-    except Exception:
-        return "N/A"
-def process_split_inputs():
-    """Process all JSON files from split_inputs folder and scrape dimensions"""
+                job_result = await asyncio.wrap_future(parse_pool.submit(html))
+                result, error = parse_pool.finish_job(job_result), None
+            except Exception as e:
+                result, error = None, e
+            if not parsed.done():
+                if error is None:
+                    parsed.set_result(result)
+                else:
+                    parsed.set_exception(error)
+
+    async def inline_worker(url):
+        async with semaphore:
+            return await loop.run_in_executor(executor, scrape_dimensions_result, url)
+
+    async def pipelined_worker(url):
+        async with semaphore:
+            fetched = await loop.run_in_executor(executor, fetch_page_result, url)
+            if isinstance(fetched, ScrapeResult):
+                return fetched
+            html, known = fetched
+            if known is None:
+                parsed = loop.create_future()
+                await parse_queue.put((html, parsed))
+                parse_pool.record_queue_depth(parse_queue.qsize())
+        if known is not None:
+            return await loop.run_in_executor(executor, finish_result, url, known, False)
+        try:
+            known = await parsed
+        except Exception as e:
+            return parse_failed(url, e)
+        return await loop.run_in_executor(executor, finish_result, url, known, True)
+
+    if not pipelined:
+        parsers = []
+        tasks = [asyncio.ensure_future(inline_worker(url)) for url in urls]
+    else:
+        parsers = [asyncio.ensure_future(parser()) for _ in range(parse_pool.PARSE_WORKERS)]
+        tasks = [asyncio.ensure_future(pipelined_worker(url)) for url in urls]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks + parsers:
+            task.cancel()
+        await asyncio.gather(*tasks, *parsers, return_exceptions=True)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def scrape_results_many(urls, concurrency=DEFAULT_CONCURRENCY, checkpoint=None):
+    """Scrape many product pages concurrently, yielding a ScrapeResult as each completes.
+
+    Synchronous wrapper around `scrape_results_async` for the batch scripts.
+    Fetches keep running in the background while the caller handles a result.
+    With a `checkpoint` journal (see journal.Journal), URLs it already holds
+    are answered from it without a fetch, and every page scraped is appended
+    to it; failed fetches are not, so a resumed run retries them.
+    """
+    urls = list(urls)
+    if checkpoint is not None:
+        pending = []
+        for url in urls:
+            record = checkpoint.get(url)
+            if record is None:
+                pending.append(url)
+            else:
+                yield ScrapeResult(url, record["status"], read_dimension(record["dimensions"]), record["source"], None)
+        urls = pending
+
+    loop = asyncio.new_event_loop()
+    results = scrape_results_async(urls, concurrency=concurrency)
+    try:
+        while True:
+            try:
+                result = loop.run_until_complete(results.__anext__())
+            except StopAsyncIteration:
+                return
+            if checkpoint is not None and result.status != FAILED:
+                checkpoint.append(result.url, status=result.status, dimensions=dimension_text(result.dimension),
+                                  source=result.source)
+            yield result
+    finally:
+        loop.run_until_complete(results.aclose())
+        loop.close()
+        dimension_store.save()
+        strategy_stats.save()
+
+
+def scrape_dimensions_many(urls, concurrency=DEFAULT_CONCURRENCY, checkpoint=None):
+    """Scrape many product pages concurrently, yielding (url, Dimension or None) as each completes."""
+    for result in scrape_results_many(urls, concurrency=concurrency, checkpoint=checkpoint):
+        yield result.url, result.dimension
+
+
+def refresh_stale_in_background(urls, budget=dimension_store.DEFAULT_REFRESH_BUDGET,
+                                concurrency=DEFAULT_CONCURRENCY):
+    """Re-scrape up to `budget` stale URLs on a background thread.
+
+    Results land in the dimension store for the next run. Returns the started
+    thread (or None if there is nothing to refresh); join it before exiting.
+    """
+    urls = list(dict.fromkeys(urls))[:budget]
+    if not urls:
+        return None
+
+    def refresh():
+        for _ in scrape_dimensions_many(urls, concurrency=concurrency):
+            pass
+
+    thread = threading.Thread(target=refresh, name="dimension-refresh")
+    thread.start()
+    return thread
+
+
+def process_split_inputs(concurrency=DEFAULT_CONCURRENCY, rate=None):
+    """Process all JSON files from split_inputs folder and scrape dimensions
+
+    `rate` overrides the per-host request rate (requests/second) for this run.
+    """
+    if rate is not None:
+        rate_limit.configure(rate=rate)
+
     ROOT_DIR = Path(__file__).parent
     INPUT_DIR = ROOT_DIR / "split_inputs"
     OUTPUT_DIR = ROOT_DIR / "split_output"
@@ -104,65 +555,87 @@ def process_split_inputs():
     print("=" * 70)
     print(f"\n[INFO] Found {len(input_files)} file(s) to process\n")
     
-    total_products = 0
+    # Plan: load every file and dedupe product URLs across all of them
+    plan = work_plan.build_plan(sorted(input_files))
+    for input_file, error in plan.errors:
+        print(f"[ERROR] Invalid JSON in {input_file.name}: {error}")
+    for product in plan.without_url:
+        print(f"  [SKIP] {product.get('Product Name', 'Unknown')}: No URL")
+    print(f"[PLAN] {plan.describe()}\n")
+    
+    total_products = plan.references + len(plan.without_url)
     total_with_dims = 0
+    total_failed = 0
+    total_gone = 0
+    
+    # Zero-fetch pass: mine listing fields before queueing any page fetch
+    urls = []
+    for product_url, url_products in plan.products_by_url.items():
+        for product in url_products:
+            dimension, source = listing_dimensions(product)
+            if dimension is not None:
+                break
+        if dimension is not None:
+            plan.apply(product_url, "Dimensions", dimension_text(dimension))
+            dimension_store.record(product_url, dimension_text(dimension), source)
+            total_with_dims += len(url_products)
+        else:
+            urls.append(product_url)
+    print(f"[LISTING] {len(plan.urls) - len(urls)} dimensions found in listing fields (page fetches avoided)\n")
     
-    for input_file in sorted(input_files):
-        print(f"\n[PROCESSING] {input_file.name}")
-        print("-" * 70)
+    # Scrape each remaining unique page once, reporting each one as it completes;
+    # pages an interrupted run already scraped are replayed from its journal
+    checkpoint = journal.Journal("process_split_inputs")
+    if checkpoint.completed:
+        print(f"[RESUME] {len(checkpoint.completed)} pages already scraped by an interrupted run\n")
+    results = scrape_results_many(urls, concurrency=concurrency, checkpoint=checkpoint)
+    for done, result in enumerate(results, 1):
+        dimensions = dimension_text(result.dimension)
+        url_products = plan.apply(result.url, "Dimensions", dimensions)
+        product_name = url_products[0].get("Product Name", "Unknown")
         
+        # Truncate long names for display
+        display_name = product_name[:28] + "..." if len(product_name) > 28 else product_name
+        print(f"  [{done:4d}/{len(urls)}] {display_name:<35}", end=" ")
+        
+        if result.status == FOUND:
+            total_with_dims += len(url_products)
+            print(f"[OK] {dimensions}")
+        elif result.status == FAILED:
+            total_failed += len(url_products)
+            print(f"[ERROR] {result.error[:40]}")
+        elif result.status == GONE:
+            total_gone += len(url_products)
+            print(f"[GONE] {result.error or 'page removed'}")
+        else:
+            print(f"[NONE]")
+    
+    # Fan results back out: save every file with its updated products
+    print()
+    for input_file, data in plan.documents:
         try:
-            # Load input data
-            with open(input_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            products = data.get("products", [])
-            print(f"[INFO] Found {len(products)} products")
-            
-            file_dims_count = 0
-            
-            # Process each product
-            for idx, product in enumerate(products, 1):
-                product_name = product.get("Product Name", "Unknown")
-                product_url = product.get("Product URL", "")
-                
-                # Truncate long names for display
-                display_name = product_name[:28] + "..." if len(product_name) > 28 else product_name
-                print(f"  [{idx:3d}/{len(products)}] {display_name:<35}", end=" ", flush=True)
-                
-                if product_url:
-                    dimensions = scrape_dimensions(product_url)
-                    product["Dimensions"] = dimensions
-                    
-                    if dimensions != "N/A":
-                        file_dims_count += 1
-                        total_with_dims += 1
-                        print(f"[OK] {dimensions}")
-                    else:
-                        print(f"[NONE]")
-                    
-                    # Be nice to the server - add small delay
-                    time.sleep(0.2)
-                else:
-                    print("[SKIP] No URL")
-                
-                total_products += 1
+            products = work_plan.products_of(data)
+            file_dims_count = sum(1 for p in products if p.get("Dimensions", "N/A") != "N/A")
             
-            # Save output file
             output_file = OUTPUT_DIR / input_file.name
             with open(output_file, "w", encoding="utf-8") as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
             
-            print(f"\n[SUCCESS] Saved: {output_file.name} ({file_dims_count}/{len(products)} dimensions found)")
+            print(f"[SUCCESS] Saved: {output_file.name} ({file_dims_count}/{len(products)} dimensions found)")
             
-        except json.JSONDecodeError as e:
-            print(f"\n[ERROR] Invalid JSON in {input_file.name}: {str(e)}")
         except Exception as e:
-            print(f"\n[ERROR] Processing {input_file.name}: {str(e)}")
+            print(f"[ERROR] Saving {input_file.name}: {str(e)}")
+    checkpoint.finish()
     
     print("\n" + "=" * 70)
     print("[COMPLETED] All files processed!")
     print(f"[STATS] {total_with_dims}/{total_products} products have dimensions")
+    if total_failed:
+        print(f"[STATS] {total_failed} products failed to fetch or parse (re-run to retry them)")
+    if total_gone:
+        print(f"[STATS] {total_gone} products point at removed pages (not retried)")
+    for line in describe_run_stats():
+        print(line)
     print(f"[OUTPUT] Results saved in: split_output/")
     print("=" * 70)
 
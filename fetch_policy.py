@@ -0,0 +1,200 @@
+"""Retry, backoff and per-host circuit breaking for IKEA page requests.
+
+`get()` wraps `http_client.get` so transient failures (timeouts, connection
+errors, 429 and 5xx responses) are retried with jittered exponential backoff.
+When pages on a host keep failing after their retries, the host's circuit
+opens: requests to it wait until the reset timeout has passed instead of each
+hammering a host that is down, then one trial request decides whether the
+circuit closes again. A request that waits longer than OPEN_WAIT fails with
+CircuitOpenError.
+"""
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+import http_client
+
+MAX_RETRIES = 3
+# Backoff before retry n is uniform in [0, min(MAX_BACKOFF, BASE_BACKOFF * 2**n)]
+BASE_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Consecutive failed pages (retries exhausted) that open a host's circuit
+FAILURE_THRESHOLD = 5
+# Seconds an open circuit holds requests before letting a trial through
+RESET_TIMEOUT = 30.0
+# Seconds a request waits on an open circuit before giving up
+OPEN_WAIT = 120.0
+
+
+class FetchError(Exception):
+    """A page could not be fetched after retries (network/server failure)."""
+
+    def __init__(self, url, reason):
+        super().__init__(f"{reason} ({url})")
+        self.url = url
+        self.reason = reason
+
+
+class CircuitOpenError(FetchError):
+    """The host's circuit is open; the request was not sent."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one host.
+
+    A failure is one page whose retries ran out, not one attempt, so a single
+    page that keeps answering 503 cannot open the circuit on its own.
+    """
+
+    def __init__(self, threshold=None, reset_timeout=None):
+        self.threshold = threshold or FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or RESET_TIMEOUT
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def wait(self, timeout):
+        """Block until a request may be sent; False if `timeout` seconds pass first.
+
+        Once the reset timeout has passed, one trial request is let through;
+        the others keep waiting until its outcome closes or re-opens the
+        circuit (or until it has been out for a whole reset timeout).
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                if self.opened_at is None:
+                    return True
+                now = time.monotonic()
+                ready = self.opened_at + self.reset_timeout
+                if self.trial_started is not None:
+                    ready = max(ready, self.trial_started + self.reset_timeout)
+                if now >= ready:
+                    self.trial_started = now
+                    return True
+                if now >= deadline:
+                    return False
+                self._changed.wait(min(ready, deadline) - now)
+
+    def is_open(self):
+        with self._lock:
+            return self.opened_at is not None
+
+    def record_success(self):
+        with self._changed:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_started = None
+            self._changed.notify_all()
+
+    def record_failure(self):
+        with self._changed:
+            self.failures += 1
+            if self.trial_started is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                self.trial_started = None
+                self._changed.notify_all()
+
+
+_lock = threading.Lock()
+_breakers = {}
+_stats = {"retries": 0, "failures": 0, "held": 0, "rejected": 0}
+
+
+def configure(max_retries=None, failure_threshold=None, reset_timeout=None, open_wait=None):
+    """Change retry and circuit settings, including for hosts already seen."""
+    global MAX_RETRIES, FAILURE_THRESHOLD, RESET_TIMEOUT, OPEN_WAIT
+    with _lock:
+        if max_retries is not None:
+            MAX_RETRIES = max_retries
+        if failure_threshold is not None:
+            FAILURE_THRESHOLD = failure_threshold
+        if reset_timeout is not None:
+            RESET_TIMEOUT = reset_timeout
+        if open_wait is not None:
+            OPEN_WAIT = open_wait
+        for breaker in _breakers.values():
+            with breaker._lock:
+                breaker.threshold = FAILURE_THRESHOLD
+                breaker.reset_timeout = RESET_TIMEOUT
+
+
+def breaker_for(url):
+    """Return the shared circuit breaker for the host of `url`."""
+    host = urlsplit(url).netloc.lower()
+    with _lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker()
+        return breaker
+
+
+def _count(stat):
+    with _lock:
+        _stats[stat] += 1
+
+
+def is_permanent(status_code):
+    """True for client errors that retrying will not fix (4xx other than 408/429, e.g. 404 or 410)."""
+    return 400 <= status_code < 500 and status_code not in RETRY_STATUSES
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+    return random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt))
+
+
+def get(url, **kwargs):
+    """GET `url` with retries and circuit breaking.
+
+    Returns the response for anything that is not a transient failure
+    (including 304 and 404). Raises FetchError when retries are exhausted and
+    CircuitOpenError when the host's circuit stayed open for OPEN_WAIT seconds.
+    """
+    breaker = breaker_for(url)
+    # The circuit gates pages, not attempts: once sent, a page uses all its retries
+    if breaker.is_open():
+        _count("held")
+    if not breaker.wait(OPEN_WAIT):
+        _count("rejected")
+        raise CircuitOpenError(url, "circuit open")
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = http_client.get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            reason = type(e).__name__
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return response
+            reason = f"HTTP {response.status_code}"
+            response.close()
+
+        if attempt < MAX_RETRIES:
+            _count("retries")
+            time.sleep(backoff_delay(attempt))
+
+    breaker.record_failure()
+    _count("failures")
+    raise FetchError(url, reason)
+
+
+def stats():
+    """Return a copy of the retry/failure/held/rejected counters."""
+    with _lock:
+        return dict(_stats)
+
+
+def describe_stats():
+    """One-line retry summary for run summaries."""
+    s = stats()
+    return (f"{s['retries']} retries, {s['failures']} failed after retries, "
+            f"{s['held']} held by open circuit, {s['rejected']} rejected after waiting")
@@ -1,12 +1,24 @@
 import json
-import time
 from pathlib import Path
 
-from dimensions import extract_dimensions_reliable, scrape_dimensions
+import dimension_store
+import journal
+import rate_limit
+from dimension_patterns import dimension_text
+from dimensions import DEFAULT_CONCURRENCY, FAILED, FOUND, GONE, describe_run_stats, listing_dimensions, refresh_stale_in_background, scrape_results_many
 
 
-def fill_missing_dimensions(enrich_scrape=True, delay=0.2):
-    """Fill missing Dimensions only for products that have null/empty Dimension fields"""
+def fill_missing_dimensions(enrich_scrape=True, rate=None, concurrency=DEFAULT_CONCURRENCY,
+                            refresh_budget=dimension_store.DEFAULT_REFRESH_BUDGET):
+    """Fill missing Dimensions only for products that have null/empty Dimension fields
+
+    Stored dimensions are used before scraping; stale ones are re-scraped in the
+    background (at most `refresh_budget` per run) once all files are written.
+    Scraped pages are journaled, so a rerun after a crash skips them.
+    """
+    if rate is not None:
+        rate_limit.configure(rate=rate)
+
     root = Path(__file__).parent
     out_dir = root / 'split_output'
     files = sorted([p for p in out_dir.glob('*.json') if 'combined' not in p.name])
@@ -17,8 +29,14 @@ def fill_missing_dimensions(enrich_scrape=True, delay=0.2):
 
     print(f'Found {len(files)} files to process\n')
 
+    checkpoint = journal.Journal('fill_missing_dimensions')
+    if checkpoint.completed:
+        print(f'Resuming: {len(checkpoint.completed)} pages already scraped by an interrupted run\n')
+
     total_missing = 0
     total_filled = 0
+    fetches_avoided = 0
+    stale_urls = []
 
     for file in files:
         print(f'Scanning {file.name}...')
@@ -40,37 +58,53 @@ def fill_missing_dimensions(enrich_scrape=True, delay=0.2):
 
             print(f'  Found {len(missing_products)} products with missing dimensions')
             changed = 0
+            to_scrape = {}
 
             for idx, p in missing_products:
                 product_name = p.get('Product Name', 'Unknown')[:30]
                 
-                # Try reliable extractor first (offline)
-                current = p.get('Dimensions') or p.get('dimension') or p.get('Dimension') or ''
-                extracted = extract_dimensions_reliable(current)
+                # Try listing-level fields first (offline: text, name, image/URL slugs)
+                extracted, source = listing_dimensions(p)
 
-                if extracted and extracted != 'N/A':
-                    p['Dimensions'] = extracted
+                if extracted is not None:
+                    p['Dimensions'] = dimension_text(extracted)
                     changed += 1
-                    print(f'    [{idx}] {product_name:<30} [EXTRACTED] {extracted}')
+                    fetches_avoided += 1
+                    print(f'    [{idx}] {product_name:<30} [EXTRACTED] {extracted} ({source})')
                     continue
 
-                # Fallback: try scraping if allowed and url present
+                # Fallback: answer from the dimension store, else queue for scraping
                 url = p.get('Product URL') or p.get('ProductURL') or p.get('url')
-                if enrich_scrape and url:
-                    try:
-                        scraped = scrape_dimensions(url)
-                        if scraped and scraped != 'N/A':
-                            p['Dimensions'] = scraped
-                            changed += 1
-                            print(f'    [{idx}] {product_name:<30} [SCRAPED] {scraped}')
-                        else:
-                            print(f'    [{idx}] {product_name:<30} [FAILED]')
-                    except Exception as e:
-                        print(f'    [{idx}] {product_name:<30} [ERROR] {str(e)[:30]}')
-                    time.sleep(delay)
+                stored = dimension_store.lookup(url) if enrich_scrape and url else None
+                if stored:
+                    if not dimension_store.is_fresh(stored):
+                        stale_urls.append(url)
+                    if stored['dimensions'] != 'N/A':
+                        p['Dimensions'] = stored['dimensions']
+                        changed += 1
+                        print(f'    [{idx}] {product_name:<30} [STORED] {stored["dimensions"]}')
+                    else:
+                        print(f'    [{idx}] {product_name:<30} [FAILED]')
+                elif enrich_scrape and url:
+                    to_scrape.setdefault(url, []).append((idx, p))
                 else:
                     print(f'    [{idx}] {product_name:<30} [SKIPPED]')
 
+            # Scrape queued product pages concurrently
+            for result in scrape_results_many(to_scrape, concurrency=concurrency, checkpoint=checkpoint):
+                for idx, p in to_scrape[result.url]:
+                    product_name = p.get('Product Name', 'Unknown')[:30]
+                    if result.status == FOUND:
+                        p['Dimensions'] = dimension_text(result.dimension)
+                        changed += 1
+                        print(f'    [{idx}] {product_name:<30} [SCRAPED] {result.dimension}')
+                    elif result.status == FAILED:
+                        print(f'    [{idx}] {product_name:<30} [ERROR] {result.error[:30]}')
+                    elif result.status == GONE:
+                        print(f'    [{idx}] {product_name:<30} [GONE] {result.error or "page removed"}')
+                    else:
+                        print(f'    [{idx}] {product_name:<30} [FAILED]')
+
             # Write back to same file
             with open(file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
@@ -82,11 +116,19 @@ def fill_missing_dimensions(enrich_scrape=True, delay=0.2):
         except Exception as e:
             print(f'  Error processing {file.name}: {e}\n')
 
+    checkpoint.finish()
+
     print(f'=== SUMMARY ===')
     print(f'Total products with missing dimensions: {total_missing}')
     print(f'Total filled: {total_filled}')
     print(f'Success rate: {100 * total_filled / total_missing if total_missing > 0 else 0:.1f}%')
+    print(f'Page fetches avoided by listing fields: {fetches_avoided}')
+    for line in describe_run_stats():
+        print(line)
+
+    if refresh_stale_in_background(stale_urls, budget=refresh_budget, concurrency=concurrency):
+        print(f'Refreshing up to {refresh_budget} stale stored dimensions in the background')
 
 
 if __name__ == '__main__':
-    fill_missing_dimensions(enrich_scrape=True, delay=0.2)
+    fill_missing_dimensions(enrich_scrape=True)
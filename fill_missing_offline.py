@@ -1,31 +1,12 @@
 import json
 from pathlib import Path
-import re
+
+from dimension_patterns import describe_memo_stats, extract_dimensions
 
 # Offline dimension extraction - no network needed
 def extract_dimensions_reliable(text):
-    """Extract clean dimensions from text using multiple strategies"""
-    if not text:
-        return "N/A"
-    
-    # Strategy 1: Look for standard dimension patterns (e.g., 39x30 cm, 90x200x50 cm)
-    patterns = [
-        r'(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*cm',  # 3D
-        r'(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*cm',  # 2D
-        r'W\s*(\d+(?:\.\d+)?)\s*x\s*D\s*(\d+(?:\.\d+)?)\s*x\s*H\s*(\d+(?:\.\d+)?)\s*cm',  # W x D x H
-        r'Length\s*(\d+(?:\.\d+)?)\s*x\s*Width\s*(\d+(?:\.\d+)?)\s*x\s*Height\s*(\d+(?:\.\d+)?)\s*cm',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            groups = match.groups()
-            if len(groups) == 3 and groups[2]:
-                return f"{groups[0]}x{groups[1]}x{groups[2]}cm"
-            elif len(groups) >= 2:
-                return f"{groups[0]}x{groups[1]}cm"
-    
-    return "N/A"
+    """Extract clean dimensions from text, formatted without a space (e.g. 39x30cm)"""
+    return extract_dimensions(text, unit="cm")
 
 
 def fill_missing_dimensions_offline():
@@ -98,6 +79,7 @@ def fill_missing_dimensions_offline():
     print(f'Total products with missing dimensions: {total_missing}')
     print(f'Total filled (offline): {total_filled}')
     print(f'Still missing: {total_missing - total_filled}')
+    print(f'Dimension memo: {describe_memo_stats()}')
 
 
 if __name__ == '__main__':
@@ -1,15 +1,27 @@
 import argparse
 import json
 import os
-import re
-import time
 from pathlib import Path
 
+from dimension_patterns import describe_memo_stats, first_dimension, read_dimension
+
 # optional import for dimension scraping
 try:
-    from dimensions import scrape_dimensions
+    import dimension_store
+    import journal
+    import rate_limit
+    from dimensions import DEFAULT_CONCURRENCY, describe_run_stats, listing_dimensions, refresh_stale_in_background, scrape_dimensions_many
+    from work_plan import canonical_url
 except Exception:
-    scrape_dimensions = None
+    dimension_store = None
+    journal = None
+    rate_limit = None
+    canonical_url = None
+    DEFAULT_CONCURRENCY = 8
+    describe_run_stats = None
+    listing_dimensions = None
+    refresh_stale_in_background = None
+    scrape_dimensions_many = None
 
 def clean_text(text):
     """Remove [U+200E] and other unwanted characters"""
@@ -74,7 +86,7 @@ def get_type_from_subtype(subtype):
 
 
 def clean_dimension(text):
-    """Extract and normalize dimension like '90x55 cm' -> '90x55cm' or '35 cm' -> '35cm'."""
+    """Extract and normalize dimension like '90x55 cm' -> '90x55cm' or '35 cm' -> '35cm'"""
     if not isinstance(text, str) or not text:
         return ''
 
@@ -82,14 +94,64 @@ def clean_dimension(text):
     text = clean_text(text)
 
     # Look for patterns like: 90x55 cm, 53x43x69 cm, 75 cm
-    m = re.search(r'(\d+(?:\.\d+)?(?:\s*x\s*\d+(?:\.\d+)?){0,2}\s*cm)', text, re.IGNORECASE)
-    if m:
-        dim = m.group(1)
-        dim = re.sub(r'\s*x\s*', 'x', dim)
-        dim = re.sub(r'\s*cm', 'cm', dim, flags=re.IGNORECASE)
-        return dim
-
-    return ''
+    return format_dimension(first_dimension(text))
+
+def format_dimension(dimension):
+    """A parsed Dimension as written to the output files ('90x55cm', '35cm'), or '' for None"""
+    return dimension.format(unit='cm') if dimension is not None else ''
+
+def _clean_text_fast(text):
+    # The characters clean_text removes are all non-ASCII, so ASCII text only needs strip()
+    if isinstance(text, str) and text.isascii():
+        return text.strip()
+    return clean_text(text)
+
+def _map_unique(values, fn):
+    """fn() over a column of values, computing each distinct string only once."""
+    # Only exact strings share results: equal non-strings (1, 1.0, True) must not
+    results = {value: fn(value) for value in set(value for value in values if type(value) is str)}
+    return [results[value] if type(value) is str else fn(value) for value in values]
+
+def clean_text_column(values):
+    """clean_text() over a whole column at once."""
+    return _map_unique(values, _clean_text_fast)
+
+def clean_dimension_column(values):
+    """clean_dimension() over a whole column at once."""
+    return _map_unique(values, clean_dimension)
+
+def build_products(rows, first_id=1):
+    """Normalize raw product rows column by column into combined product dicts.
+
+    `rows` are (name, dimension, price, type, subtype, url) tuples as read from the
+    input. Returns a list aligned with `rows`: the product dict, or None for a row
+    without a name (those get no ID).
+    """
+    names = clean_text_column([row[0] for row in rows])
+    dims = clean_dimension_column([row[1] for row in rows])
+    prices = [row[2] for row in rows]
+    types = [row[3] for row in rows]
+    subtypes = [row[4] for row in rows]
+    urls = clean_text_column([row[5] for row in rows])
+
+    products = []
+    product_id = first_id
+    for name, dim, price, type_name, subtype, url in zip(names, dims, prices, types, subtypes, urls):
+        if not name:
+            products.append(None)
+            continue
+        products.append({
+            'ID': f'I-{product_id:04d}',
+            'Name': name,
+            'Dimension': dim,
+            'Price': price,
+            'Type': type_name,
+            'SubType': subtype,
+            'Brand': 'IKEA',
+            'ProductURL': url
+        })
+        product_id += 1
+    return products
 
 def process_output_files(input_path=None):
     """Process `output.json` (if present) or fall back to existing split_output behavior.
@@ -97,8 +159,8 @@ def process_output_files(input_path=None):
     Returns a list of normalized product dicts.
     """
     base_dir = Path(__file__).parent
-    combined_products = []
-    product_id_counter = 1
+    # raw (name, dimension, price, type, subtype, url) rows, normalized in bulk at the end
+    rows = []
 
     # prefer explicit input file, else look for root output.json
     if input_path is None:
@@ -115,33 +177,21 @@ def process_output_files(input_path=None):
             products = data.get('products', []) if isinstance(data, dict) else (data if isinstance(data, list) else [])
 
             for product in products:
-                product_name = clean_text(product.get('Product Name', '') or product.get('name', '') or product.get('Name', ''))
-                if not product_name:
-                    continue
-
-                raw_dim = product.get('Dimensions', '') or product.get('dimension', '') or product.get('Dimension', '')
-                cleaned_dim = clean_dimension(raw_dim)
-
-                processed_product = {
-                    'ID': f'I-{product_id_counter:04d}',
-                    'Name': product_name,
-                    'Dimension': cleaned_dim,
-                    'Price': product.get('Price', '') or product.get('price', ''),
-                    'Type': '',
-                    'SubType': '',
-                    'Brand': 'IKEA',
-                    'ProductURL': clean_text(product.get('Product URL', '') or product.get('ProductURL', '') or product.get('url', ''))
-                }
-
-                combined_products.append(processed_product)
-                product_id_counter += 1
+                rows.append((
+                    product.get('Product Name', '') or product.get('name', '') or product.get('Name', ''),
+                    product.get('Dimensions', '') or product.get('dimension', '') or product.get('Dimension', ''),
+                    product.get('Price', '') or product.get('price', ''),
+                    '',
+                    '',
+                    product.get('Product URL', '') or product.get('ProductURL', '') or product.get('url', ''),
+                ))
 
         except json.JSONDecodeError as e:
             print(f"Error processing {candidate.name}: {e}")
         except Exception as e:
             print(f"Unexpected error processing {candidate.name}: {e}")
 
-        return combined_products
+        return [product for product in build_products(rows) if product is not None]
 
     # fallback: existing split_output behavior
     output_dir = base_dir / 'split_output'
@@ -158,46 +208,48 @@ def process_output_files(input_path=None):
 
             products = data if isinstance(data, list) else data.get('products', [])
 
+            type_name = get_type_from_subtype(subtype)
             for product in products:
-                product_name = clean_text(product.get('name', '') or product.get('Name', '') or product.get('Product Name', ''))
-                if not product_name:
-                    continue
-
-                raw_dim = product.get('dimension', '') or product.get('Dimension', '')
-                cleaned_dim = clean_dimension(raw_dim)
-
-                processed_product = {
-                    'ID': f'I-{product_id_counter:04d}',
-                    'Name': product_name,
-                    'Dimension': cleaned_dim,
-                    'Price': product.get('price', '') or product.get('Price', ''),
-                    'Type': get_type_from_subtype(subtype),
-                    'SubType': subtype,
-                    'Brand': 'IKEA',
-                    'ProductURL': clean_text(product.get('url', '') or product.get('ProductURL', '') or product.get('Product URL', ''))
-                }
-
-                combined_products.append(processed_product)
-                product_id_counter += 1
+                rows.append((
+                    product.get('name', '') or product.get('Name', '') or product.get('Product Name', ''),
+                    product.get('dimension', '') or product.get('Dimension', ''),
+                    product.get('price', '') or product.get('Price', ''),
+                    type_name,
+                    subtype,
+                    product.get('url', '') or product.get('ProductURL', '') or product.get('Product URL', ''),
+                ))
 
         except json.JSONDecodeError as e:
             print(f"Error processing {json_file.name}: {e}")
         except Exception as e:
             print(f"Unexpected error processing {json_file.name}: {e}")
 
-    return combined_products
+    return [product for product in build_products(rows) if product is not None]
 
 
-def combine_split_output_files(enrich_missing=True, batch_size=0, out_base='ikea_Jan'):
+def combine_split_output_files(enrich_missing=True, batch_size=0, out_base='ikea_Jan', concurrency=DEFAULT_CONCURRENCY, rate=None, refresh_budget=None):
     """Combine all files in `split_output`, preserve SubType/Type, and enrich missing dimensions.
 
-    If `enrich_missing` is True and `dimensions.scrape_dimensions` is available, the function will
-    attempt to fetch dimensions from product pages for items missing a clean dimension.
+    If `enrich_missing` is True and `dimensions.scrape_dimensions_many` is available, items missing a
+    clean dimension are answered from the dimension store first; the rest are fetched concurrently
+    (up to `concurrency` at once). Stale store entries are used as-is and up to `refresh_budget` of
+    them are re-scraped in the background. `rate` overrides the per-host request rate (requests/second).
+    Scraped pages are appended to a journal (fsync'd every `batch_size` pages, or journal.COMMIT_EVERY),
+    so a rerun with the same `out_base` after a crash skips the pages already scraped.
     """
     base_dir = Path(__file__).parent
     output_dir = base_dir / 'split_output'
     combined_products = []
-    product_id_counter = 1
+    # raw (name, dimension, price, type, subtype, url) rows and their products, normalized in bulk
+    rows = []
+    raw_products = []
+    # URL -> combined products still missing a clean dimension
+    to_scrape = {}
+    stale_urls = []
+    answered_from_listing = 0
+    answered_from_store = 0
+    # stored pages that had no dimensions: not re-scraped until their entry goes stale
+    stored_without_dims = 0
 
     json_files = sorted([f for f in output_dir.glob('*.json') if 'combined' not in f.name])
     print(f"Found {len(json_files)} files to combine from split_output")
@@ -213,46 +265,77 @@ def combine_split_output_files(enrich_missing=True, batch_size=0, out_base='ikea
             products = data if isinstance(data, list) else data.get('products', [])
 
             for product in products:
-                product_name = clean_text(product.get('Product Name', '') or product.get('name', '') or product.get('Name', ''))
-                if not product_name:
-                    continue
-
-                raw_dim = product.get('Dimensions', '') or product.get('dimension', '') or product.get('Dimension', '')
-                cleaned_dim = clean_dimension(raw_dim)
-
-                # If no clean dimension and enrichment requested, try scraping
-                if not cleaned_dim and enrich_missing and scrape_dimensions and product.get('Product URL'):
-                    try:
-                        scraped = scrape_dimensions(product.get('Product URL'))
-                        cleaned_dim = clean_dimension(scraped)
-                        # be gentle
-                        time.sleep(0.15)
-                    except Exception:
-                        cleaned_dim = ''
-
-                processed_product = {
-                    'ID': f'I-{product_id_counter:04d}',
-                    'Name': product_name,
-                    'Dimension': cleaned_dim,
-                    'Price': product.get('Price', '') or product.get('price', ''),
-                    'Type': type_name,
-                    'SubType': subtype,
-                    'Brand': 'IKEA',
-                    'ProductURL': clean_text(product.get('Product URL', '') or product.get('ProductURL', '') or product.get('url', ''))
-                }
-
-                combined_products.append(processed_product)
-                product_id_counter += 1
-
-                # Periodically save progress so long runs are resumable
-                if batch_size and product_id_counter % batch_size == 0:
-                    save_combined_output(combined_products, base_name=f"{out_base}_partial")
+                rows.append((
+                    product.get('Product Name', '') or product.get('name', '') or product.get('Name', ''),
+                    product.get('Dimensions', '') or product.get('dimension', '') or product.get('Dimension', ''),
+                    product.get('Price', '') or product.get('price', ''),
+                    type_name,
+                    subtype,
+                    product.get('Product URL', '') or product.get('ProductURL', '') or product.get('url', ''),
+                ))
+                raw_products.append(product)
 
         except json.JSONDecodeError as e:
             print(f"Error processing {json_file.name}: {e}")
         except Exception as e:
             print(f"Unexpected error processing {json_file.name}: {e}")
 
+    for product, processed_product in zip(raw_products, build_products(rows)):
+        if processed_product is None:
+            continue
+        combined_products.append(processed_product)
+
+        # If no clean dimension and enrichment requested, answer from listing fields,
+        # then the store, else queue for scraping
+        url = product.get('Product URL')
+        if not processed_product['Dimension'] and enrich_missing and scrape_dimensions_many and url:
+            listed = format_dimension(listing_dimensions(product)[0])
+            stored = None if listed else dimension_store.lookup(url)
+            if listed:
+                processed_product['Dimension'] = listed
+                answered_from_listing += 1
+            elif stored:
+                if stored['dimensions'] != 'N/A':
+                    processed_product['Dimension'] = format_dimension(read_dimension(stored['dimensions']))
+                    answered_from_store += 1
+                else:
+                    stored_without_dims += 1
+                if not dimension_store.is_fresh(stored):
+                    stale_urls.append(url)
+            else:
+                to_scrape.setdefault(canonical_url(url), []).append(processed_product)
+
+    if answered_from_listing:
+        print(f"Found {answered_from_listing} missing dimensions in listing fields (page fetches avoided)")
+    if answered_from_store:
+        print(f"Answered {answered_from_store} missing dimensions from the dimension store ({len(stale_urls)} stale)")
+    if stored_without_dims:
+        print(f"Skipped {stored_without_dims} products whose stored page has no dimensions")
+
+    if (to_scrape or stale_urls) and rate is not None:
+        rate_limit.configure(rate=rate)
+
+    if to_scrape:
+        checkpoint = journal.Journal(out_base, commit_every=batch_size or None)
+        if checkpoint.completed:
+            print(f"Resuming: {len(checkpoint.completed)} pages already scraped by an interrupted run")
+        print(f"Scraping {len(to_scrape)} product pages for missing dimensions")
+        results = scrape_dimensions_many(to_scrape, concurrency=concurrency, checkpoint=checkpoint)
+        for url, scraped in results:
+            cleaned_dim = format_dimension(scraped)
+            for processed_product in to_scrape[url]:
+                processed_product['Dimension'] = cleaned_dim
+        # Everything scraped is now in the dimension store too, so the journal can go
+        checkpoint.finish()
+
+        for line in describe_run_stats():
+            print(line)
+
+    if stale_urls:
+        budget = dimension_store.DEFAULT_REFRESH_BUDGET if refresh_budget is None else refresh_budget
+        if refresh_stale_in_background(stale_urls, budget=budget, concurrency=concurrency):
+            print(f"Refreshing up to {budget} stale dimensions in the background")
+
     return combined_products
 
 def save_combined_output(products, base_name='ikea_combined'):
@@ -289,16 +372,20 @@ if __name__ == '__main__':
     parser.add_argument('--split', action='store_true', help='Combine files from split_output (use subtypes)')
     parser.add_argument('--no-enrich', action='store_true', help='Do not scrape product pages for missing dimensions')
     parser.add_argument('--out', type=str, default='ikea_Jan', help='Base name for output files')
-    parser.add_argument('--batch-size', type=int, default=0, help='Save progress every N products when scraping')
+    parser.add_argument('--batch-size', type=int, default=0, help='Fsync the resume journal every N scraped products')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Number of product pages to fetch at once')
+    parser.add_argument('--rate', type=float, default=None, help='Max requests per second per host when scraping')
+    parser.add_argument('--refresh-budget', type=int, default=None, help='Max stale stored dimensions to re-scrape in the background')
 
     args = parser.parse_args()
 
     print("Starting IKEA product finisher...\n")
 
     if args.split:
-        combined_products = combine_split_output_files(enrich_missing=not args.no_enrich, batch_size=args.batch_size, out_base=args.out)
+        combined_products = combine_split_output_files(enrich_missing=not args.no_enrich, batch_size=args.batch_size, out_base=args.out, concurrency=args.concurrency, rate=args.rate, refresh_budget=args.refresh_budget)
     else:
         combined_products = process_output_files()
+    print(f"Dimension memo: {describe_memo_stats()}")
 
     save_combined_output(combined_products, base_name=args.out)
     save_csv_output(combined_products, base_name=args.out)
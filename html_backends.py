@@ -0,0 +1,157 @@
+"""Pluggable HTML parser backends for product page extraction.
+
+`extract_dimensions_with_source` only needs four things from a page: its
+full text, the meta description, the text of elements whose class looks
+like a measurement block, and the first JSON-LD script. Each backend
+exposes exactly those on a small document object, so the pure-Python
+html.parser can be swapped for lxml or selectolax (lexbor) without
+changing the extraction logic.
+
+The backend is picked by `configure()` / the IKEA_HTML_BACKEND environment
+variable, or auto-detected (fastest installed first).
+"""
+import os
+
+from bs4 import BeautifulSoup
+
+# Fastest first; "auto" uses the first one that imports
+BACKENDS = ("selectolax", "lxml", "html.parser")
+
+# Text inside these elements is left out of a page's text, as BeautifulSoup's get_text() does
+NON_TEXT_TAGS = ("script", "style", "template")
+
+_backend = None
+
+
+class SoupDocument:
+    """BeautifulSoup with the stdlib html.parser (always available)."""
+
+    name = "html.parser"
+
+    def __init__(self, html):
+        self.soup = BeautifulSoup(html, "html.parser")
+
+    def text(self):
+        return self.soup.get_text()
+
+    def meta_description(self):
+        meta = self.soup.find("meta", {"name": "description"})
+        return meta.get("content") if meta else None
+
+    def class_sections(self, tags, pattern, limit):
+        sections = self.soup.find_all(tags, {"class": pattern}, limit=limit)
+        return [section.get_text() for section in sections]
+
+    def json_ld(self):
+        script = self.soup.find("script", {"type": "application/ld+json"})
+        return script.string if script else None
+
+
+class LxmlDocument:
+    """lxml.html tree (libxml2)."""
+
+    name = "lxml"
+
+    def __init__(self, html):
+        import lxml.html
+        try:
+            self.root = lxml.html.fromstring(html)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration
+            self.root = lxml.html.fromstring(html.encode("utf-8"))
+
+    def text(self):
+        return "".join(self.root.xpath(
+            "//text()[not(parent::script or parent::style or ancestor::template)]"))
+
+    def meta_description(self):
+        metas = self.root.xpath('//meta[@name="description"]')
+        return metas[0].get("content") if metas else None
+
+    def class_sections(self, tags, pattern, limit):
+        sections = []
+        for element in self.root.iter(*tags):
+            if pattern.search(element.get("class") or ""):
+                sections.append(element.text_content())
+                if len(sections) >= limit:
+                    break
+        return sections
+
+    def json_ld(self):
+        scripts = self.root.xpath('//script[@type="application/ld+json"]')
+        return scripts[0].text if scripts else None
+
+
+class LexborDocument:
+    """selectolax's lexbor parser."""
+
+    name = "selectolax"
+
+    def __init__(self, html):
+        from selectolax.lexbor import LexborHTMLParser
+        self.tree = LexborHTMLParser(html)
+
+    def text(self):
+        # strip_tags mutates the tree, so work on a copy; meta/JSON-LD still need the scripts
+        tree = self.tree.clone()
+        tree.strip_tags(list(NON_TEXT_TAGS))
+        return tree.root.text(deep=True) if tree.root else ""
+
+    def meta_description(self):
+        meta = self.tree.css_first('meta[name="description"]')
+        return meta.attributes.get("content") if meta else None
+
+    def class_sections(self, tags, pattern, limit):
+        sections = []
+        for element in self.tree.css(", ".join(tags)):
+            if pattern.search(element.attributes.get("class") or ""):
+                sections.append(element.text(deep=True))
+                if len(sections) >= limit:
+                    break
+        return sections
+
+    def json_ld(self):
+        script = self.tree.css_first('script[type="application/ld+json"]')
+        return script.text(deep=True) if script else None
+
+
+_DOCUMENTS = {cls.name: cls for cls in (LexborDocument, LxmlDocument, SoupDocument)}
+
+
+def available_backends():
+    """Names of the backends whose libraries are installed, fastest first."""
+    names = []
+    for name in BACKENDS:
+        try:
+            if name == "selectolax":
+                import selectolax.lexbor  # noqa: F401
+            elif name == "lxml":
+                import lxml.html  # noqa: F401
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def configure(backend="auto"):
+    """Select the parser backend by name, or "auto" for the fastest installed one."""
+    global _backend
+    if backend == "auto":
+        backend = available_backends()[0]
+    elif backend not in available_backends():
+        raise ValueError(f"HTML backend {backend!r} is not available "
+                         f"(installed: {', '.join(available_backends())})")
+    _backend = backend
+    return backend
+
+
+def current_backend():
+    """Name of the backend `parse()` uses, selecting one on first use."""
+    if _backend is None:
+        configure(os.environ.get("IKEA_HTML_BACKEND", "auto"))
+    return _backend
+
+
+def parse(html, backend=None):
+    """Parse `html` with `backend` (default: the configured one) into a document."""
+    return _DOCUMENTS[backend or current_backend()](html)
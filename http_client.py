@@ -0,0 +1,146 @@
+"""Shared, pooled HTTP client for IKEA page requests.
+
+Every page fetch goes through one `requests.Session` so TCP/TLS connections to
+www.ikea.com are kept alive and reused instead of re-handshaking per product.
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import rate_limit
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+# Number of per-host connection pools kept around
+POOL_CONNECTIONS = 10
+# Connections kept open per host; requests beyond this wait for a free connection
+POOL_MAXSIZE = 16
+# Reuse connections between requests (sends "Connection: close" when False)
+KEEP_ALIVE = True
+
+DEFAULT_TIMEOUT = 15
+
+_session = None
+_lock = threading.Lock()
+_stats = {"requests": 0, "connections": 0}
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+class _CountingConnection:
+    """Counts every TCP connect, including urllib3 reconnecting a dropped connection."""
+
+    def connect(self):
+        _count("connections")
+        super().connect()
+
+    def request(self, *args, **kwargs):
+        _count("requests")
+        return super().request(*args, **kwargs)
+
+
+class _CountingHTTPConnection(_CountingConnection, HTTPConnection):
+    pass
+
+
+class _CountingHTTPSConnection(_CountingConnection, HTTPSConnection):
+    pass
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools count connects and requests for connection_stats()."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def configure(pool_connections=None, pool_maxsize=None, keep_alive=None):
+    """Change pool settings. The shared session is rebuilt on next use."""
+    global POOL_CONNECTIONS, POOL_MAXSIZE, KEEP_ALIVE, _session
+    with _lock:
+        if pool_connections is not None:
+            POOL_CONNECTIONS = pool_connections
+        if pool_maxsize is not None:
+            POOL_MAXSIZE = pool_maxsize
+        if keep_alive is not None:
+            KEEP_ALIVE = keep_alive
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = _CountingAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    if not KEEP_ALIVE:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def get(url, **kwargs):
+    """GET `url` through the shared pool (same signature as `requests.get`).
+
+    Waits on the per-host rate limiter first, and pauses the host when the
+    server answers 429 / Retry-After.
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    rate_limit.acquire(url)
+    response = get_session().get(url, **kwargs)
+    rate_limit.honor_response(url, response)
+    return response
+
+
+def connection_stats():
+    """Return request/connection counters for this process.
+
+    `connections` is the number of TCP connects made (each one a handshake),
+    counting reconnects of connections the server had closed; `reused` is
+    how many requests went over an already open one.
+    """
+    with _lock:
+        stats = dict(_stats)
+    stats["reused"] = max(stats["requests"] - stats["connections"], 0)
+    return stats
+
+
+def describe_connection_stats():
+    """One-line summary of connection reuse for run summaries."""
+    stats = connection_stats()
+    return (f"{stats['requests']} requests over {stats['connections']} connections "
+            f"({stats['reused']} reused)")
@@ -0,0 +1,155 @@
+"""Read product measurements straight out of a page's embedded JSON.
+
+IKEA product pages carry their product data twice: as HTML, and as JSON for
+client-side hydration (data-hydration-props attributes, JSON script tags such
+as __NEXT_DATA__, JSON-LD). `payloads()` pulls those blobs out with plain
+substring scans - no regex over the page, no DOM - and `measurement_texts()`
+reads the measurement fields from the decoded JSON, at any depth.
+"""
+import html as html_lib
+import json
+import re
+
+# Attribute holding a hydrated component's props as HTML-escaped JSON
+HYDRATION_ATTR = 'data-hydration-props="'
+# Markers in a <script ...> tag whose body is JSON
+JSON_SCRIPT_MARKERS = ('application/json', 'application/ld+json', '__NEXT_DATA__')
+# Keys under which product data keeps its measurements
+MEASUREMENT_KEYS = ("dimensionProps", "measurementProps", "measurements", "dimensions")
+# A payload is only decoded if it mentions one of these (cheap substring prefilter)
+PAYLOAD_HINTS = tuple(f'"{key}"' for key in MEASUREMENT_KEYS) + ('"width"', '"depth"', '"height"')
+
+# Axis names in output order; IKEA writes sizes as width x depth x height
+AXES = (("width",), ("depth", "length"), ("height",))
+# Fields that name a measurement / hold its value in a list of measurements
+NAME_FIELDS = ("type", "name", "label")
+VALUE_FIELDS = ("measure", "value", "text")
+
+CENTIMETRES_RE = re.compile(r"^\s*(\d+(?:[.,]\d+)?)\s*cm\s*$", re.IGNORECASE)
+CENTIMETRE_UNITS = ("cm", "cmt")
+
+
+def payloads(html):
+    """Yield the JSON text of every hydration attribute and JSON script in `html`."""
+    position = 0
+    while True:
+        start = html.find(HYDRATION_ATTR, position)
+        if start < 0:
+            break
+        start += len(HYDRATION_ATTR)
+        end = html.find('"', start)
+        if end < 0:
+            break
+        yield html_lib.unescape(html[start:end])
+        position = end
+
+    position = 0
+    while True:
+        start = html.find("<script", position)
+        if start < 0:
+            return
+        body_start = html.find(">", start) + 1
+        body_end = html.find("</script", body_start)
+        if body_start == 0 or body_end < 0:
+            return
+        tag = html[start:body_start]
+        if any(marker in tag for marker in JSON_SCRIPT_MARKERS):
+            yield html[body_start:body_end]
+        position = body_end
+
+
+def _centimetres(value):
+    """Number of centimetres in a "80 cm" string or {"value", "unitCode"} dict, as text."""
+    if isinstance(value, dict):
+        unit = str(value.get("unitCode") or value.get("unitText") or value.get("unit") or "").lower()
+        number = value.get("value")
+        if unit in CENTIMETRE_UNITS and isinstance(number, (int, float)) and not isinstance(number, bool):
+            return f"{number:g}"
+        return None
+    if isinstance(value, str):
+        match = CENTIMETRES_RE.match(value)
+        if match:
+            return match.group(1).replace(",", ".")
+    return None
+
+
+def _axes_text(sizes):
+    """Join the sizes found per axis into "WxDxH cm", or None with fewer than two."""
+    values = [sizes[names[0]] for names in AXES if names[0] in sizes]
+    return "x".join(values) + " cm" if len(values) >= 2 else None
+
+
+def _axis(name):
+    name = str(name).lower()
+    for names in AXES:
+        if any(alias in name for alias in names):
+            return names[0]
+    return None
+
+
+def _texts_from(value):
+    """Yield candidate dimension texts from the value of a measurement key."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        sizes = {}
+        for key, item in value.items():
+            axis = _axis(key)
+            size = _centimetres(item) if axis else None
+            if size is not None:
+                sizes.setdefault(axis, size)
+        text = _axes_text(sizes)
+        if text:
+            yield text
+        for item in value.values():
+            if isinstance(item, (dict, list, str)):
+                yield from _texts_from(item)
+    elif isinstance(value, list):
+        # A list of {"name": "Width", "measure": "80 cm"}-style entries
+        sizes = {}
+        for item in value:
+            if not isinstance(item, dict):
+                continue
+            name = next((item[f] for f in NAME_FIELDS if isinstance(item.get(f), str)), None)
+            size = next((_centimetres(item[f]) for f in VALUE_FIELDS if f in item), None)
+            axis = _axis(name) if name else None
+            if axis and size is not None:
+                sizes.setdefault(axis, size)
+        text = _axes_text(sizes)
+        if text:
+            yield text
+        for item in value:
+            yield from _texts_from(item)
+
+
+def _measurement_values(node):
+    """Yield the values stored under MEASUREMENT_KEYS (or width/depth/height) anywhere in `node`."""
+    if isinstance(node, dict):
+        if sum(1 for names in AXES if any(alias in node for alias in names)) >= 2:
+            yield node
+        for key, value in node.items():
+            if key in MEASUREMENT_KEYS:
+                yield value
+            elif isinstance(value, (dict, list)):
+                yield from _measurement_values(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _measurement_values(item)
+
+
+def measurement_texts(html):
+    """Yield texts that may hold a product's dimensions, from its embedded JSON.
+
+    Named width/depth/height values are joined into "WxDxH cm"; free-text
+    measurement strings are passed through. Callers run each one through the
+    usual dimension patterns.
+    """
+    for payload in payloads(html):
+        if not any(hint in payload for hint in PAYLOAD_HINTS):
+            continue
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            continue
+        for value in _measurement_values(data):
+            yield from _texts_from(value)
@@ -1,12 +1,12 @@
-import requests
 from bs4 import BeautifulSoup
 import json
 
+import http_client
+
 url = 'https://www.ikea.com/in/en/p/stickat-bed-pocket-black-60378339/'
-headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
 
 try:
-    response = requests.get(url, headers=headers, timeout=10)
+    response = http_client.get(url, timeout=10)
     soup = BeautifulSoup(response.text, 'html.parser')
     
     # Check for JSON-LD
@@ -0,0 +1,147 @@
+"""Append-only checkpoint journals for resumable scraping runs.
+
+Each scraping entry point keeps a journal under JOURNAL_DIR with one JSON line
+per completed unit of work:
+
+    {"key": "<product url>", "status": "found", "dimensions": "80x28x202 cm", "source": "json_ld"}
+
+Lines are written as each item completes and fsync'd in groups: once every
+COMMIT_EVERY lines or COMMIT_SECONDS, whichever comes first. A crash loses no
+more than the last group, and the cost is one append per item instead of
+rewriting a whole output file. On startup `Journal` replays the file, so
+completed keys can be skipped. A line torn by a crash is dropped. A run
+that finishes removes its journal with `finish()`.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+JOURNAL_DIR = Path(__file__).parent / ".journal"
+# Group commit: fsync after this many appended lines...
+COMMIT_EVERY = 64
+# ...or this many seconds since the last fsync, whichever comes first
+COMMIT_SECONDS = 1.0
+
+_lock = threading.Lock()
+_stats = {"replayed": 0, "appended": 0, "commits": 0}
+
+
+def configure(journal_dir=None, commit_every=None, commit_seconds=None):
+    """Change journal settings for this process."""
+    global JOURNAL_DIR, COMMIT_EVERY, COMMIT_SECONDS
+    if journal_dir is not None:
+        JOURNAL_DIR = Path(journal_dir)
+    if commit_every is not None:
+        COMMIT_EVERY = commit_every
+    if commit_seconds is not None:
+        COMMIT_SECONDS = commit_seconds
+
+
+def _record(stat, amount=1):
+    with _lock:
+        _stats[stat] += amount
+
+
+class Journal:
+    """The journal of one entry point, replayed on creation.
+
+    `completed` maps each journaled key to its record (the line without "key").
+    Use as a context manager, or call `close()`, so the last group is committed.
+    """
+
+    def __init__(self, name, commit_every=None):
+        self.path = JOURNAL_DIR / f"{name}.jsonl"
+        self.commit_every = commit_every or COMMIT_EVERY
+        self.completed = {}
+        self._file = None
+        self._pending = 0
+        self._last_commit = time.monotonic()
+        self._lock = threading.Lock()
+        self._replay()
+
+    def _replay(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # torn by a crash mid-write
+            try:
+                record = json.loads(line)
+                key = record.pop("key")
+            except (ValueError, KeyError, AttributeError):
+                break
+            self.completed[key] = record
+            end += len(line)
+        if end < len(data):  # cut the torn tail so new lines start on a clean one
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+        _record("replayed", len(self.completed))
+
+    def get(self, key):
+        """The record journaled for `key`, or None."""
+        return self.completed.get(key)
+
+    def append(self, key, **record):
+        """Journal `key` as completed with `record`; fsync'd with its group."""
+        line = json.dumps({"key": key, **record}, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()  # in the OS cache, so a crash of this process loses nothing
+            self.completed[key] = record
+            self._pending += 1
+            if self._pending >= self.commit_every or time.monotonic() - self._last_commit >= COMMIT_SECONDS:
+                self._commit()
+        _record("appended")
+
+    def _commit(self):
+        if self._file is not None and self._pending:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+            _record("commits")
+        self._last_commit = time.monotonic()
+
+    def commit(self):
+        """fsync lines appended since the last group commit."""
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        """Commit and close the file; the journal stays for the next run to replay."""
+        with self._lock:
+            self._commit()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def finish(self):
+        """Close and remove the journal once the run's output is safely written."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def stats():
+    """Return a copy of the journal counters."""
+    with _lock:
+        return dict(_stats)
+
+
+def describe_stats():
+    """One-line journal summary for run summaries."""
+    s = stats()
+    return (f"{s['replayed']} completed items replayed, {s['appended']} appended "
+            f"in {s['commits']} fsync group commits")
@@ -0,0 +1,293 @@
+"""Persistent on-disk cache of IKEA product page HTML.
+
+Entries are keyed by the article number in the product URL slug
+(`/p/...-80576319/`), so every pipeline stage that fetches the same product
+shares one cached copy. Bodies are gzip-compressed and stored
+content-addressed under their SHA-256, so identical pages share a blob.
+
+Entries older than TTL_SECONDS are stale but kept (up to STALE_KEEP_SECONDS
+more) so they can be revalidated with their ETag / Last-Modified validators.
+Expired entries are removed by `evict()`, which the first `put()` of a process
+runs whatever the cache size.
+
+Layout under CACHE_DIR:
+    index/<article>.json   {"url", "sha256", "fetched_at", "size", "partial",
+                            "etag", "last_modified", "dimensions", "source"}
+
+A "partial" entry holds only the start of a page (the download stopped once
+its dimension was found); it is served by its stored dimension, never as HTML.
+    blobs/<sha256>.gz      gzip-compressed page body
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent / ".page_cache"
+# Entries younger than this are served without contacting the server
+TTL_SECONDS = 7 * 24 * 3600
+# How long past the TTL a stale entry is kept for conditional revalidation
+STALE_KEEP_SECONDS = 28 * 24 * 3600
+# Cap on total compressed blob size; oldest entries are evicted past it
+MAX_BYTES = 500 * 1024 * 1024
+ENABLED = True
+
+ARTICLE_RE = re.compile(r"-(s?\d{8})/?$", re.IGNORECASE)
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "revalidated": 0, "bytes_saved": 0}
+_total_bytes = None
+_expiry_done = False  # evict() has run in this process for CACHE_DIR
+
+
+def configure(enabled=None, ttl=None, max_bytes=None, cache_dir=None):
+    """Change cache settings for this process."""
+    global ENABLED, TTL_SECONDS, MAX_BYTES, CACHE_DIR, _total_bytes, _expiry_done
+    with _lock:
+        if enabled is not None:
+            ENABLED = enabled
+        if ttl is not None:
+            TTL_SECONDS = ttl
+        if max_bytes is not None:
+            MAX_BYTES = max_bytes
+        if cache_dir is not None:
+            CACHE_DIR = Path(cache_dir)
+            _total_bytes = None
+            _expiry_done = False
+
+
+def article_number(url):
+    """Return the IKEA article number from a product URL, or None."""
+    path = url.split("?", 1)[0].split("#", 1)[0]
+    match = ARTICLE_RE.search(path)
+    return match.group(1).lower() if match else None
+
+
+def cache_key(url):
+    """Article number when the URL has one, else a hash of the URL."""
+    return article_number(url) or "url-" + hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+
+
+def _index_path(key):
+    return CACHE_DIR / "index" / f"{key}.json"
+
+
+def _blob_path(digest):
+    return CACHE_DIR / "blobs" / f"{digest}.gz"
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _write_entry(url, entry):
+    _write_atomic(_index_path(cache_key(url)), json.dumps(entry).encode("utf-8"))
+
+
+def _read_entry(key):
+    try:
+        with open(_index_path(key), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def record(stat, amount=1):
+    """Bump a cache counter ("hits", "misses", "revalidated", "bytes_saved")."""
+    with _lock:
+        _stats[stat] += amount
+
+
+def lookup(url):
+    """Return the index entry for `url` (fresh or stale), or None."""
+    if not ENABLED:
+        return None
+    return _read_entry(cache_key(url))
+
+
+def is_fresh(entry):
+    """True when `entry` is younger than TTL_SECONDS."""
+    return time.time() - entry.get("fetched_at", 0) <= TTL_SECONDS
+
+
+def read_body(entry):
+    """Return the cached page text for `entry`, or None if the blob is gone."""
+    try:
+        with open(_blob_path(entry["sha256"]), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+    except (OSError, KeyError, EOFError, gzip.BadGzipFile):
+        return None
+
+
+def validators(entry):
+    """Conditional request headers for revalidating a stale `entry`."""
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def mark_revalidated(url, entry):
+    """Refresh `entry` after a 304 Not Modified and return it."""
+    entry = dict(entry, fetched_at=time.time())
+    _write_entry(url, entry)
+    record("revalidated")
+    return entry
+
+
+def set_dimensions(url, dimensions, source=None):
+    """Remember the dimension (and strategy) extracted from the cached body of `url`."""
+    entry = lookup(url)
+    if entry is None:
+        return
+    entry["dimensions"] = dimensions
+    entry["source"] = source
+    _write_entry(url, entry)
+
+
+def put(url, text, etag=None, last_modified=None, partial=False):
+    """Store page text and its validators for `url`.
+
+    Evicts when over the size cap, and once per process to drop expired entries.
+    """
+    global _total_bytes, _expiry_done
+    if not ENABLED:
+        return
+
+    body = text.encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()
+    blob = _blob_path(digest)
+    added = 0
+    if not blob.exists():
+        compressed = gzip.compress(body, mtime=0)
+        _write_atomic(blob, compressed)
+        added = len(compressed)
+
+    entry = {"url": url, "sha256": digest, "fetched_at": time.time(), "size": len(body),
+             "partial": partial, "etag": etag, "last_modified": last_modified}
+    _write_entry(url, entry)
+
+    with _lock:
+        if _total_bytes is None:
+            _total_bytes = _blob_bytes()
+        else:
+            _total_bytes += added
+        run_evict = _total_bytes > MAX_BYTES or not _expiry_done
+        _expiry_done = True
+    if run_evict:
+        evict()
+
+
+def _blob_bytes():
+    blob_dir = CACHE_DIR / "blobs"
+    if not blob_dir.exists():
+        return 0
+    return sum(p.stat().st_size for p in blob_dir.glob("*.gz"))
+
+
+def evict():
+    """Remove entries past TTL + STALE_KEEP_SECONDS, then oldest until under MAX_BYTES.
+
+    Returns the number of index entries removed.
+    """
+    global _total_bytes
+    index_dir = CACHE_DIR / "index"
+    if not index_dir.exists():
+        return 0
+
+    now = time.time()
+    entries = []
+    removed = 0
+    for path in index_dir.glob("*.json"):
+        entry = _read_entry(path.stem)
+        if entry is None or now - entry.get("fetched_at", 0) > TTL_SECONDS + STALE_KEEP_SECONDS:
+            path.unlink(missing_ok=True)
+            removed += 1
+            continue
+        entries.append((entry.get("fetched_at", 0), path, entry.get("sha256")))
+
+    # Blob sizes, and which blobs are still referenced by a live entry
+    blob_sizes = {p.stem: p.stat().st_size for p in (CACHE_DIR / "blobs").glob("*.gz")}
+    refs = {}
+    for _, _, digest in entries:
+        refs[digest] = refs.get(digest, 0) + 1
+
+    total = sum(size for digest, size in blob_sizes.items() if digest in refs)
+    entries.sort()
+    for _, path, digest in entries:
+        if total <= MAX_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        removed += 1
+        refs[digest] -= 1
+        if refs[digest] == 0:
+            total -= blob_sizes.get(digest, 0)
+
+    for digest in blob_sizes:
+        if not refs.get(digest):
+            _blob_path(digest).unlink(missing_ok=True)
+
+    with _lock:
+        _total_bytes = total
+    return removed
+
+
+def iter_pages(limit=None):
+    """Yield (url, html) for cached pages, e.g. as a benchmark corpus.
+
+    Partial entries are skipped: their body stops where the download did.
+    """
+    index_dir = CACHE_DIR / "index"
+    if not index_dir.exists():
+        return
+    count = 0
+    for path in sorted(index_dir.glob("*.json")):
+        entry = _read_entry(path.stem)
+        html = read_body(entry) if entry and not entry.get("partial") else None
+        if html is None:
+            continue
+        yield entry.get("url", path.stem), html
+        count += 1
+        if limit and count >= limit:
+            return
+
+
+def partial_entries(limit=None):
+    """Yield (url, entry) for cached pages stored only partially (see `put`)."""
+    index_dir = CACHE_DIR / "index"
+    if not index_dir.exists():
+        return
+    count = 0
+    for path in sorted(index_dir.glob("*.json")):
+        entry = _read_entry(path.stem)
+        if not entry or not entry.get("partial"):
+            continue
+        yield entry.get("url", path.stem), entry
+        count += 1
+        if limit and count >= limit:
+            return
+
+
+def stats():
+    """Return a copy of the hit/miss/bytes_saved counters."""
+    with _lock:
+        return dict(_stats)
+
+
+def describe_stats():
+    """One-line cache summary for run summaries."""
+    s = stats()
+    lookups = s["hits"] + s["misses"]
+    rate = 100 * s["hits"] / lookups if lookups else 0
+    return (f"{s['hits']} hits ({s['revalidated']} revalidated by 304), {s['misses']} misses "
+            f"({rate:.1f}% hit rate), {s['bytes_saved'] / 1024 / 1024:.1f} MB not re-downloaded")
@@ -0,0 +1,160 @@
+"""Locate the regions of a product page that can hold its dimensions.
+
+Instead of parsing a whole several-hundred-KB page, a cheap regex scan over
+the raw HTML finds the product-information / measurement elements, the meta
+description and the JSON-LD scripts, and returns just those slices. Only
+the slices are then parsed (see `dimensions.extract_dimensions_targeted`).
+"""
+import html as html_lib
+import re
+
+# class="..." attributes, and the class names that mark a product-information or
+# measurement block. The attribute scan is case-sensitive on purpose: a literal
+# prefix lets the regex engine skip ahead, which IGNORECASE would prevent.
+CLASS_ATTR_RE = re.compile(r"class\s*=\s*[\"']([^\"']*)[\"']")
+REGION_CLASS_RE = re.compile(
+    r"measure|dimension|size|spec|product-summary|product-information|product-details",
+    re.IGNORECASE,
+)
+# Elements that can be a region (the class attribute must sit on one of these)
+REGION_TAGS = {"div", "span", "p", "section", "dl", "ul", "table"}
+TAG_NAME_RE = re.compile(r"<([a-zA-Z][a-zA-Z0-9]*)")
+META_DESCRIPTION_RE = re.compile(
+    r"<meta\b[^>]*?\bname\s*=\s*[\"']description[\"'][^>]*>", re.IGNORECASE)
+CONTENT_ATTR_RE = re.compile(r"\bcontent\s*=\s*(?:\"([^\"]*)\"|'([^']*)')", re.IGNORECASE)
+JSON_LD_RE = re.compile(
+    r"<script\b[^>]*?\btype\s*=\s*[\"']application/ld\+json[\"'][^>]*>(.*?)</script\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Longest slice taken for one region; guards against unbalanced markup
+MAX_REGION_CHARS = 50_000
+
+_tag_res = {}
+
+
+def _tag_re(tag):
+    tag = tag.lower()
+    if tag not in _tag_res:
+        _tag_res[tag] = re.compile(rf"<(/?){tag}\b[^>]*?(/?)>", re.IGNORECASE)
+    return _tag_res[tag]
+
+
+def _closing_tag_end(html, start, tag):
+    """Index just past the tag that closes the element opening at `start`, or None."""
+    depth = 0
+    for match in _tag_re(tag).finditer(html, start, min(len(html), start + MAX_REGION_CHARS)):
+        if match.group(1):
+            depth -= 1
+            if depth == 0:
+                return match.end()
+        elif not match.group(2):
+            depth += 1
+    return None
+
+
+def _element_end(html, start, tag):
+    """Like _closing_tag_end, but falls back to the MAX_REGION_CHARS cut-off."""
+    end = _closing_tag_end(html, start, tag)
+    return end if end is not None else min(len(html), start + MAX_REGION_CHARS)
+
+
+def region_slices(html, limit=5):
+    """Return up to `limit` HTML slices of product-information/measurement elements.
+
+    Regions nested inside an already-returned region are skipped.
+    """
+    slices = []
+    position = 0
+    while len(slices) < limit:
+        match = CLASS_ATTR_RE.search(html, position)
+        if not match:
+            break
+        position = match.end()
+        if not REGION_CLASS_RE.search(match.group(1)):
+            continue
+        # Walk back to the opening tag that carries this class attribute
+        start = html.rfind("<", 0, match.start())
+        tag = TAG_NAME_RE.match(html, start) if start >= 0 else None
+        if tag is None or tag.group(1).lower() not in REGION_TAGS:
+            continue
+        end = _element_end(html, start, tag.group(1))
+        slices.append(html[start:end])
+        position = end
+    return slices
+
+
+def meta_description(html):
+    """Content of the page's meta description, or None."""
+    match = META_DESCRIPTION_RE.search(html)
+    if not match:
+        return None
+    content = CONTENT_ATTR_RE.search(match.group(0))
+    if not content:
+        return None
+    return html_lib.unescape(content.group(1) if content.group(1) is not None else content.group(2))
+
+
+def json_ld_scripts(html):
+    """Bodies of all application/ld+json scripts, in page order."""
+    return [match.group(1) for match in JSON_LD_RE.finditer(html)]
+
+
+class RegionScanner:
+    """Finds the same regions as above in HTML that arrives in pieces.
+
+    `feed()` returns ("region" | "meta" | "json_ld", text) pairs as soon as each
+    one is complete, so a streaming download can stop at the first useful one.
+    """
+
+    def __init__(self, limit=5):
+        self.html = ""
+        self.limit = limit
+        self.regions = 0
+        self.position = 0
+        self.meta_done = False
+        self.json_ld_done = False
+        self.json_ld_from = 0
+
+    def feed(self, text):
+        """Append `text` and return the snippets it completed."""
+        self.html += text
+        found = []
+
+        if not self.meta_done:
+            content = meta_description(self.html)
+            if content is not None:
+                found.append(("meta", content))
+            if content is not None or "</head>" in self.html:
+                self.meta_done = True
+
+        if not self.json_ld_done:
+            match = JSON_LD_RE.search(self.html, self.json_ld_from)
+            if match:
+                found.append(("json_ld", match.group(1)))
+                self.json_ld_done = True
+            else:
+                # Scripts don't nest, so an unfinished JSON-LD script starts at the last "<script"
+                last_open = self.html.rfind("<script", self.json_ld_from)
+                self.json_ld_from = last_open if last_open >= 0 else max(0, len(self.html) - len("<script"))
+
+        while self.regions < self.limit:
+            match = CLASS_ATTR_RE.search(self.html, self.position)
+            if not match:
+                break
+            start = match.start()
+            if REGION_CLASS_RE.search(match.group(1)):
+                tag_start = self.html.rfind("<", 0, start)
+                tag = TAG_NAME_RE.match(self.html, tag_start) if tag_start >= 0 else None
+                if tag is not None and tag.group(1).lower() in REGION_TAGS:
+                    end = _closing_tag_end(self.html, tag_start, tag.group(1))
+                    if end is None and len(self.html) - tag_start < MAX_REGION_CHARS:
+                        break  # element not complete yet; look again after the next chunk
+                    end = end if end is not None else tag_start + MAX_REGION_CHARS
+                    found.append(("region", self.html[tag_start:end]))
+                    self.regions += 1
+                    self.position = end
+                    continue
+            self.position = match.end()
+
+        return found
@@ -0,0 +1,197 @@
+"""Parse/extract workers that run apart from the network workers.
+
+Parsing a product page and running the extraction strategies is CPU-bound,
+so on the fetch threads it serializes on the GIL. In "process" mode the
+scrape pipeline (see `dimensions.scrape_results_async`) hands downloaded HTML
+through a bounded queue to a ProcessPoolExecutor with one worker per core,
+so extraction throughput scales with cores while fetch threads only wait on
+the network. "inline" parses on the fetch thread, as before.
+
+"thread" runs the same workers on a ThreadPoolExecutor. On a free-threaded
+(no-GIL) interpreter that uses every core without pickling pages to other
+processes; with the GIL it only helps while a parser releases it. The state
+extraction shares (page cache, strategy stats, memos, rate limiter) is
+guarded by locks, so the mode is safe either way.
+
+"interpreter" (Python 3.14+) runs the workers in subinterpreters through
+InterpreterPoolExecutor: isolated like processes, so no shared state, but
+cheaper to start and smaller. Extension modules that cannot load in a
+subinterpreter would break it, so the pool runs a probe job first and falls
+back to "process" when subinterpreters are missing or the probe fails.
+
+The mode comes from `configure()` or the IKEA_PARSE_MODE environment variable.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import strategy_stats
+
+MODES = ("inline", "thread", "process", "interpreter")
+# Parse workers; defaults to one per core
+PARSE_WORKERS = os.cpu_count() or 1
+
+
+def free_threaded():
+    """True if this interpreter is running without the GIL."""
+    return not getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def _default_mode():
+    # On a single core a pool only adds overhead; threads need the GIL gone to run in parallel
+    if PARSE_WORKERS == 1:
+        return "inline"
+    return "thread" if free_threaded() else "process"
+
+
+PARSE_MODE = os.environ.get("IKEA_PARSE_MODE") or _default_mode()
+# Downloaded pages waiting for a parse worker; a full queue stalls the fetchers
+QUEUE_SIZE = 2 * PARSE_WORKERS
+
+_lock = threading.Lock()
+_executor = None
+_fallback = None  # why "interpreter" mode fell back to "process", if it did
+_stats = {"pages": 0, "seconds": 0.0, "peak_queue": 0}
+
+
+def configure(mode=None, workers=None, queue_size=None):
+    """Set the parse mode (see MODES), pool size and queue bound."""
+    global PARSE_MODE, PARSE_WORKERS, QUEUE_SIZE, _fallback
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"parse mode must be one of {', '.join(MODES)}, not {mode!r}")
+        PARSE_MODE = mode
+        _fallback = None
+    if workers is not None:
+        PARSE_WORKERS = workers
+        QUEUE_SIZE = 2 * workers
+    if queue_size is not None:
+        QUEUE_SIZE = queue_size
+    shutdown()
+
+
+def _context():
+    # Forking a process that already runs fetch threads can deadlock the child
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _probe():
+    import dimensions  # noqa: F401 - fails if an extension module cannot load here
+
+
+def _interpreter_pool():
+    """An InterpreterPoolExecutor whose workers can run the extraction, or (None, reason)."""
+    try:
+        from concurrent.futures import InterpreterPoolExecutor
+    except ImportError:
+        return None, f"Python {sys.version.split()[0]} has no InterpreterPoolExecutor"
+    pool = InterpreterPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="parse")
+    try:
+        pool.submit(_probe).result()
+    except Exception as e:
+        pool.shutdown(wait=True)
+        return None, f"{type(e).__name__}: {e}"
+    return pool, None
+
+
+def executor():
+    """The shared parse executor, or None in inline mode."""
+    global _executor, _fallback, PARSE_MODE
+    if PARSE_MODE == "inline":
+        return None
+    with _lock:
+        if _executor is None and PARSE_MODE == "interpreter":
+            _executor, _fallback = _interpreter_pool()
+            if _executor is None:
+                PARSE_MODE = "process"
+        if _executor is None:
+            if PARSE_MODE == "thread":
+                _executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="parse")
+            else:
+                _executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=_context())
+        return _executor
+
+
+def shutdown():
+    """Stop the parse workers (a new pool starts on next use)."""
+    global _executor
+    with _lock:
+        pool, _executor = _executor, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _extract_timed(html):
+    import dimensions
+    start = time.perf_counter()
+    known = dimensions.extract_dimensions_with_source(html)
+    return known, time.perf_counter() - start
+
+
+def extract_job(html):
+    """Run in a parse worker process or subinterpreter: (dimensions, source) plus its strategy stats."""
+    known, seconds = _extract_timed(html)
+    return known, strategy_stats.drain(), seconds
+
+
+def _local_job(html):
+    # Threads record strategy stats straight into this process's totals
+    known, seconds = _extract_timed(html)
+    return known, None, seconds
+
+
+def submit(html):
+    """Start extracting `html` on the parse pool; the Future's result goes to finish_job."""
+    pool = executor()
+    job = _local_job if PARSE_MODE == "thread" else extract_job
+    return pool.submit(job, html)
+
+
+def finish_job(job_result):
+    """Fold a worker's stats into this process's and return its (dimensions, source)."""
+    known, records, seconds = job_result
+    if records:
+        strategy_stats.merge(records)
+    with _lock:
+        _stats["pages"] += 1
+        _stats["seconds"] += seconds
+    return tuple(known)
+
+
+def extract(html):
+    """Extract (dimensions, source) from `html`, on a parse worker unless in inline mode."""
+    if PARSE_MODE == "inline":
+        return finish_job(_local_job(html))
+    return finish_job(submit(html).result())
+
+
+def fallback_reason():
+    """Why "interpreter" mode is running as "process", or None."""
+    return _fallback
+
+
+def record_queue_depth(depth):
+    with _lock:
+        _stats["peak_queue"] = max(_stats["peak_queue"], depth)
+
+
+def stats():
+    """Return a copy of the parse counters."""
+    with _lock:
+        return dict(_stats)
+
+
+def describe_stats():
+    """One-line parse summary for run summaries."""
+    s = stats()
+    mean_ms = 1000 * s["seconds"] / s["pages"] if s["pages"] else 0
+    workers = "" if PARSE_MODE == "inline" else f", {PARSE_WORKERS} workers, peak queue {s['peak_queue']}/{QUEUE_SIZE}"
+    if PARSE_MODE == "thread" and not free_threaded():
+        workers += ", GIL enabled"
+    if _fallback:
+        workers += f", subinterpreters unavailable: {_fallback}"
+    return f"{s['pages']} pages parsed ({PARSE_MODE}{workers}), {mean_ms:.1f} ms/page"
@@ -0,0 +1,168 @@
+"""Bounded producer/consumer pipelines: source -> stages -> sink.
+
+Each stage runs `workers` threads that take items from the queue in front of
+it and put what they return on the queue behind it. Queues hold at most
+`queue_size` items, so memory stays flat however many items flow through, and
+a slow stage fills the queues in front of it until the source blocks
+(backpressure). Per-stage counters (items done, queue depth, busy time) can be
+read with `stats()` / `describe_stats()` while the pipeline runs.
+"""
+import queue
+import threading
+import time
+
+# Items waiting in front of each stage
+QUEUE_SIZE = 64
+# Seconds between progress callbacks in Pipeline.run
+REPORT_INTERVAL = 10.0
+
+_DONE = object()
+
+
+class Stage:
+    """One pipeline step: `fn(item)` returns the item for the next stage, or None to drop it."""
+
+    def __init__(self, name, fn, workers=1):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.done = 0
+        self.dropped = 0
+        self.busy = 0.0
+        self.peak_queue = 0
+        self.queue = None
+        self._running = 0
+        self._lock = threading.Lock()
+
+
+class Pipeline:
+    """Run `source` (an iterable) through `stages` into `sink(item)`, on bounded queues.
+
+    The sink runs on one thread, so it can write files without locking.
+    An exception in any stage stops the pipeline and is re-raised by `run()`;
+    stages that should survive bad items must catch their own errors.
+    """
+
+    def __init__(self, source, stages, sink, queue_size=None):
+        self.source = source
+        self.stages = list(stages) + [Stage("sink", sink)]
+        self.queue_size = queue_size or QUEUE_SIZE
+        self.started = None
+        self._stop = threading.Event()
+        self._error = None
+
+    def _put(self, stage, item):
+        """Queue `item` for `stage`, waiting while the queue is full; False if stopped."""
+        while not self._stop.is_set():
+            try:
+                stage.queue.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            depth = stage.queue.qsize()
+            with stage._lock:
+                stage.peak_queue = max(stage.peak_queue, depth)
+            return True
+        return False
+
+    def _get(self, stage):
+        while not self._stop.is_set():
+            try:
+                return stage.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _finish(self, stage):
+        """Tell the next stage's workers there is nothing more once all of `stage`'s have stopped."""
+        index = self.stages.index(stage)
+        with stage._lock:
+            stage._running -= 1
+            last = stage._running == 0
+        if last and index + 1 < len(self.stages):
+            following = self.stages[index + 1]
+            for _ in range(following.workers):
+                self._put(following, _DONE)
+
+    def _feed(self):
+        first = self.stages[0]
+        try:
+            for item in self.source:
+                if not self._put(first, item):
+                    return
+        except Exception as e:
+            self._fail(e)
+            return
+        for _ in range(first.workers):
+            self._put(first, _DONE)
+
+    def _work(self, stage, following):
+        try:
+            while True:
+                item = self._get(stage)
+                if item is _DONE:
+                    return
+                start = time.perf_counter()
+                result = stage.fn(item)
+                elapsed = time.perf_counter() - start
+                with stage._lock:
+                    stage.done += 1
+                    stage.busy += elapsed
+                    stage.dropped += result is None
+                if following is not None and result is not None and not self._put(following, result):
+                    return
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._finish(stage)
+
+    def run(self, progress=None, interval=None):
+        """Run until the source is used up and every item has reached the sink.
+
+        `progress(pipeline)` is called every `interval` seconds (REPORT_INTERVAL
+        by default) while it runs, e.g. to print `describe_stats()`.
+        """
+        self.started = time.perf_counter()
+        threads = [threading.Thread(target=self._feed, name="pipeline-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            stage.queue = queue.Queue(maxsize=self.queue_size)
+            stage._running = stage.workers
+            following = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            threads += [threading.Thread(target=self._work, args=(stage, following),
+                                         name=f"pipeline-{stage.name}-{n}", daemon=True)
+                        for n in range(stage.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(interval or REPORT_INTERVAL)
+                    if progress is not None and thread.is_alive():
+                        progress(self)
+        except BaseException:
+            self._stop.set()
+            raise
+        if self._error is not None:
+            raise self._error
+
+    def stats(self):
+        """{stage name: {"done", "dropped", "queue", "peak_queue", "busy", "per_second"}}"""
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        result = {}
+        for stage in self.stages:
+            with stage._lock:
+                result[stage.name] = {
+                    "done": stage.done, "dropped": stage.dropped,
+                    "queue": stage.queue.qsize() if stage.queue else 0, "peak_queue": stage.peak_queue,
+                    "busy": stage.busy, "per_second": stage.done / elapsed if elapsed else 0.0,
+                }
+        return result
+
+    def describe_stats(self):
+        """One-line per-stage summary (items done, rate, queue depth) for progress lines."""
+        return ", ".join(f"{name} {s['done']} ({s['per_second']:.1f}/s, queue {s['queue']}/{self.queue_size}"
+                         f" peak {s['peak_queue']})" for name, s in self.stats().items())
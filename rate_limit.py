@@ -0,0 +1,120 @@
+"""Per-host token-bucket rate limiting shared by every scraping entry point.
+
+Each host gets a bucket that refills at `rate` tokens per second up to `burst`.
+A request takes one token, waiting only if the bucket is empty, so throughput
+sits at the allowed rate instead of rate + latency + a fixed sleep.
+"""
+import email.utils
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Requests per second allowed per host
+DEFAULT_RATE = 5.0
+# Requests that may go out back-to-back after an idle period
+DEFAULT_BURST = 5
+# Pause applied on a 429 that carries no usable Retry-After header
+DEFAULT_RETRY_AFTER = 5.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket that can also be paused (e.g. on HTTP 429)."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        start = max(self.updated, self.paused_until)
+        if now > start:
+            self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold all requests for `seconds` and drain any saved-up burst."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+_rate = DEFAULT_RATE
+_burst = DEFAULT_BURST
+_buckets = {}
+_lock = threading.Lock()
+
+
+def configure(rate=None, burst=None):
+    """Set the per-host rate (requests/second) and burst for all buckets."""
+    global _rate, _burst
+    with _lock:
+        if rate is not None:
+            _rate = rate
+        if burst is not None:
+            _burst = burst
+        for bucket in _buckets.values():
+            with bucket._lock:
+                bucket.rate = _rate
+                bucket.capacity = _burst
+                bucket.tokens = min(bucket.tokens, _burst)
+
+
+def bucket_for(url):
+    """Return the shared bucket for the host of `url`."""
+    host = urlsplit(url).netloc.lower()
+    with _lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket(_rate, _burst)
+        return bucket
+
+
+def acquire(url):
+    """Wait for permission to send a request to the host of `url`."""
+    bucket_for(url).acquire()
+
+
+def pause(url, seconds):
+    """Stop sending requests to the host of `url` for `seconds`."""
+    bucket_for(url).pause(seconds)
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+def honor_response(url, response):
+    """Pause the host when `response` asks us to slow down (429 or Retry-After)."""
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    if response.status_code == 429:
+        pause(url, retry_after if retry_after is not None else DEFAULT_RETRY_AFTER)
+    elif response.status_code == 503 and retry_after is not None:
+        pause(url, retry_after)
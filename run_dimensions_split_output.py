@@ -1,61 +1,191 @@
 import json
-import time
 from pathlib import Path
 
-from dimensions import extract_dimensions_reliable, scrape_dimensions
+import dimension_store
+import journal
+import parse_pool
+import pipeline
+import rate_limit
+import strategy_stats
+from dimension_patterns import dimension_text, read_dimension
+from dimensions import (DEFAULT_CONCURRENCY, FAILED, FOUND, GONE, ScrapeResult, describe_run_stats, fetch_page_result,
+                        finish_result, listing_dimensions, parse_failed)
 
 
-def process_split_output(enrich_scrape=True, delay=0.15):
-    root = Path(__file__).parent
-    out_dir = root / 'split_output'
-    files = sorted([p for p in out_dir.glob('*.json') if 'combined' not in p.name])
+class OutputFile:
+    """A split_output file whose products are in the pipeline; written once all of them are done"""
 
-    if not files:
-        print('No files found in split_output')
-        return
+    def __init__(self, path, data, remaining):
+        self.path = path
+        self.data = data
+        self.remaining = remaining
+        self.changed = 0
 
-    print(f'Found {len(files)} files to process')
 
+class ProductItem:
+    """One product on its way through the pipeline"""
+
+    def __init__(self, output, product):
+        self.output = output
+        self.product = product
+        self.dimension = None      # a Dimension from the listing fields, or scraped
+        self.from_listing = False  # dimensions came from the listing fields, no page needed
+        self.url = None
+        self.fetched = None        # (html, known) until parsed, then the page's ScrapeResult
+
+
+def read_products(files):
+    """Pipeline source: every product of every file, one file loaded at a time"""
     for file in files:
         print(f'Processing {file.name}...')
         try:
             with open(file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
+        except Exception as e:
+            print(f'Error processing {file.name}: {e}')
+            continue
 
-            products = data.get('products', []) if isinstance(data, dict) else (data if isinstance(data, list) else [])
-            changed = 0
-
-            for p in products:
-                # current dimension fields may be under 'Dimensions' or 'Dimensions'
-                current = p.get('Dimensions') or p.get('dimension') or p.get('Dimension') or ''
+        products = data.get('products', []) if isinstance(data, dict) else (data if isinstance(data, list) else [])
+        if not products:
+            print(f'Finished {file.name}: updated 0 products')
+            continue
+        output = OutputFile(file, data, len(products))
+        for p in products:
+            yield ProductItem(output, p)
 
-                # try reliable extractor first
-                extracted = extract_dimensions_reliable(current)
 
-                if extracted and extracted != 'N/A':
-                    if p.get('Dimensions') != extracted:
-                        p['Dimensions'] = extracted
-                        changed += 1
-                    continue
+def process_split_output(enrich_scrape=True, rate=None, concurrency=DEFAULT_CONCURRENCY,
+                         report_interval=pipeline.REPORT_INTERVAL):
+    """Fill Dimensions in every split_output file through a fetch -> parse -> normalize -> write pipeline
 
-                # fallback: try scraping if allowed and url present
-                url = p.get('Product URL') or p.get('ProductURL') or p.get('url')
-                if enrich_scrape and url:
-                    scraped = scrape_dimensions(url)
-                    if scraped and scraped != 'N/A':
-                        p['Dimensions'] = scraped
-                        changed += 1
-                    time.sleep(delay)
+    Products stream through bounded queues, so only the files whose products
+    are in flight are held in memory, and a slow stage holds back the ones
+    before it. Per-stage progress is printed every `report_interval` seconds.
+    Scraped pages are journaled, so a rerun after a crash skips them.
+    """
+    if rate is not None:
+        rate_limit.configure(rate=rate)
 
-            # write back to same file
-            with open(file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+    root = Path(__file__).parent
+    out_dir = root / 'split_output'
+    files = sorted([p for p in out_dir.glob('*.json') if 'combined' not in p.name])
 
-            print(f'Finished {file.name}: updated {changed} products')
+    if not files:
+        print('No files found in split_output')
+        return
 
+    print(f'Found {len(files)} files to process')
+    fetches_avoided = 0
+    failed = 0
+    gone = 0
+
+    checkpoint = journal.Journal('run_dimensions_split_output')
+    if checkpoint.completed:
+        print(f'Resuming: {len(checkpoint.completed)} pages already scraped by an interrupted run')
+
+    def fetch(item):
+        # try listing-level fields first: current dimension text
+        # ('Dimensions'/'dimension'/'Dimension'), name, image/URL slugs
+        extracted, _ = listing_dimensions(item.product)
+        if extracted is not None:
+            item.dimension = extracted
+            item.from_listing = True
+            return item
+
+        # fallback: fetch the product page if allowed and url present,
+        # unless an interrupted run already scraped it
+        p = item.product
+        item.url = p.get('Product URL') or p.get('ProductURL') or p.get('url')
+        if not (enrich_scrape and item.url):
+            return item
+        record = checkpoint.get(item.url)
+        if record is None:
+            item.fetched = fetch_page_result(item.url)
+        elif record['status'] == FOUND:
+            item.dimension = read_dimension(record['dimensions'])
+        return item
+
+    def parse(item):
+        if item.fetched is None:
+            return item
+        if isinstance(item.fetched, ScrapeResult):  # the fetch failed or the page is gone
+            result = item.fetched
+        else:
+            html, known = item.fetched
+            parsed = known is None
+            try:
+                if parsed:
+                    known = parse_pool.extract(html)
+            except Exception as e:
+                result = parse_failed(item.url, e)
+            else:
+                result = finish_result(item.url, known, parsed)
+        item.fetched = result
+        # failures are not journaled, so a resumed run retries them
+        if result.status != FAILED:
+            checkpoint.append(item.url, status=result.status, dimensions=dimension_text(result.dimension),
+                              source=result.source)
+        if result.status == FOUND:
+            item.dimension = result.dimension
+        return item
+
+    def normalize(item):
+        nonlocal fetches_avoided, failed, gone
+        p = item.product
+        result = item.fetched
+        if result is not None and result.status == FAILED:
+            failed += 1
+            print(f'  [FAILED] {item.url}: {result.error}')
+        elif result is not None and result.status == GONE:
+            gone += 1
+            print(f'  [GONE] {item.url}: {result.error or "page removed"}')
+        if item.from_listing:
+            fetches_avoided += 1
+            text = dimension_text(item.dimension)
+            if p.get('Dimensions') != text:
+                p['Dimensions'] = text
+                item.output.changed += 1
+        elif item.dimension is not None:
+            p['Dimensions'] = dimension_text(item.dimension)
+            item.output.changed += 1
+        return item
+
+    def write(item):
+        output = item.output
+        output.remaining -= 1
+        if output.remaining:
+            return
+        try:
+            # write back to same file
+            with open(output.path, 'w', encoding='utf-8') as f:
+                json.dump(output.data, f, indent=2, ensure_ascii=False)
+            print(f'Finished {output.path.name}: updated {output.changed} products')
         except Exception as e:
-            print(f'Error processing {file.name}: {e}')
+            print(f'Error processing {output.path.name}: {e}')
+
+    run = pipeline.Pipeline(read_products(files), [
+        pipeline.Stage('fetch', fetch, workers=concurrency),
+        pipeline.Stage('parse', parse, workers=parse_pool.PARSE_WORKERS),
+        pipeline.Stage('normalize', normalize),
+    ], write)
+    try:
+        run.run(progress=lambda running: print(f'  Pipeline: {running.describe_stats()}'),
+                interval=report_interval)
+        checkpoint.finish()
+    finally:
+        checkpoint.close()
+        dimension_store.save()
+        strategy_stats.save()
+
+    print(f'Resolved from listing fields (no page fetch): {fetches_avoided}')
+    if failed:
+        print(f'Failed to fetch or parse: {failed} products (re-run to retry them)')
+    if gone:
+        print(f'Removed pages (permanent HTTP error): {gone} products')
+    for line in describe_run_stats():
+        print(line)
+    print(f'Pipeline: {run.describe_stats()}')
 
 
 if __name__ == '__main__':
-    process_split_output(enrich_scrape=True, delay=0.2)
+    process_split_output(enrich_scrape=True)
@@ -0,0 +1,141 @@
+"""Per-strategy hit rates and costs for dimension extraction, kept across runs.
+
+Every extraction strategy records whether it found a dimension and how long it
+took. Totals are saved to STATS_FILE at exit, and on the next run `order()`
+puts the strategies with the lowest expected cost per hit first, within their
+quality tier. Stats are kept per stage ("targeted" works on raw HTML, "full" on
+a parsed page, "streamed" on snippets of a page still downloading), since a
+strategy's cost depends on the stage it runs in.
+"""
+import atexit
+import json
+import os
+import threading
+from pathlib import Path
+
+STATS_FILE = Path(__file__).parent / "strategy_stats.json"
+# Reorder strategies from saved stats; False keeps the default order
+ADAPTIVE = True
+# Tries before a strategy's stats are trusted; less-tried ones run first so they catch up
+MIN_TRIES = 20
+
+_lock = threading.Lock()
+_saved = None  # {stage: {name: {"tries", "hits", "seconds"}}} totals from STATS_FILE
+_run = {}      # the same, for this run only
+_unsaved = {}  # this run's counts not yet added to STATS_FILE
+
+
+def _load():
+    global _saved
+    if _saved is None:
+        try:
+            with open(STATS_FILE, "r", encoding="utf-8") as f:
+                _saved = json.load(f)
+        except (OSError, ValueError):
+            _saved = {}
+    return _saved
+
+
+def configure(adaptive=None, stats_file=None):
+    """Turn adaptive ordering on/off or point at another stats file."""
+    global ADAPTIVE, STATS_FILE, _saved
+    if adaptive is not None:
+        ADAPTIVE = adaptive
+    if stats_file is not None:
+        STATS_FILE = Path(stats_file)
+        _saved = None
+
+
+def _add(totals, stage, name, tries, hits, seconds):
+    entry = totals.setdefault(stage, {}).setdefault(name, {"tries": 0, "hits": 0, "seconds": 0.0})
+    entry["tries"] += tries
+    entry["hits"] += hits
+    entry["seconds"] += seconds
+
+
+def record(stage, name, hit, seconds):
+    """Count one run of strategy `name` in `stage`."""
+    with _lock:
+        for totals in (_run, _unsaved):
+            _add(totals, stage, name, 1, int(bool(hit)), seconds)
+
+
+def drain():
+    """Take this process's unsaved counts, for a parse worker to hand back to its parent."""
+    global _run, _unsaved
+    with _lock:
+        records, _run, _unsaved = _unsaved, {}, {}
+    return records
+
+
+def merge(records):
+    """Add counts drained in another process to this run's."""
+    with _lock:
+        for stage, entries in records.items():
+            for name, entry in entries.items():
+                for totals in (_run, _unsaved):
+                    _add(totals, stage, name, entry["tries"], entry["hits"], entry["seconds"])
+
+
+def cost_per_hit(entry):
+    """Expected seconds spent per dimension found (hit rate smoothed towards 1/2)."""
+    hit_rate = (entry["hits"] + 1) / (entry["tries"] + 2)
+    return entry["seconds"] / max(entry["tries"], 1) / hit_rate
+
+
+def order(stage, tiers):
+    """The strategy names in `tiers` reordered by saved stats, cheapest per hit first.
+
+    `tiers` groups the names in default order, best results first. Names only
+    move within their tier, so a cheap strategy that finds less (two sizes
+    where another finds three) never runs ahead of one that finds more.
+    Hit rates are conditional: a strategy is only tried after the ones before
+    it missed, so its rate is measured on the pages they could not handle.
+    """
+    if not ADAPTIVE:
+        return [name for tier in tiers for name in tier]
+    with _lock:
+        saved = _load().get(stage, {})
+    def rank(name):
+        entry = saved.get(name)
+        if entry is None or entry["tries"] < MIN_TRIES:
+            return (0, 0.0)
+        return (1, cost_per_hit(entry))
+    return [name for tier in tiers for name in sorted(tier, key=rank)]
+
+
+def save():
+    """Add this run's counts to STATS_FILE."""
+    global _unsaved
+    with _lock:
+        if not _unsaved:
+            return
+        saved = _load()
+        for stage, entries in _unsaved.items():
+            for name, entry in entries.items():
+                _add(saved, stage, name, entry["tries"], entry["hits"], entry["seconds"])
+        tmp = STATS_FILE.with_name(STATS_FILE.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(saved, f, indent=1)
+        os.replace(tmp, STATS_FILE)
+        _unsaved = {}
+
+
+def stats():
+    """Return a copy of this run's counters, {stage: {name: {"tries", "hits", "seconds"}}}."""
+    with _lock:
+        return {stage: {name: dict(entry) for name, entry in entries.items()}
+                for stage, entries in _run.items()}
+
+
+def describe_stats():
+    """One-line per-strategy summary (hits/tries, mean cost) for run summaries."""
+    parts = []
+    for stage, entries in stats().items():
+        for name, entry in entries.items():
+            mean_ms = 1000 * entry["seconds"] / entry["tries"]
+            parts.append(f"{stage}/{name} {entry['hits']}/{entry['tries']} hits {mean_ms:.2f} ms")
+    return ", ".join(parts) if parts else "no pages parsed"
+
+
+atexit.register(save)
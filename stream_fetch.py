@@ -0,0 +1,123 @@
+"""Early-terminating streaming reads of product pages.
+
+With STREAMING on, a page is read in chunks and fed to a
+`page_regions.RegionScanner`; as soon as a measurement region, the meta
+description or the JSON-LD yields a conclusive dimension, the rest of the body
+is not parsed. A remainder of up to DRAIN_BYTES is still read so the
+connection goes back to the keep-alive pool; a longer one is not downloaded
+and the connection is closed, costing a new TCP/TLS handshake on the next
+request. That trade only pays off on large pages over slow links, so STREAMING
+is off unless turned on by `configure()` or IKEA_STREAMING=1.
+
+Only a full width x depth x height is conclusive: the meta description in
+<head> often holds just "80x28 cm" while the measurement block further down
+has "80x28x202 cm", and the targeted pass (see dimensions.TARGETED_STRATEGIES)
+would pick the latter. Pages without a conclusive snippet are read in full and
+parsed as usual.
+"""
+import codecs
+import os
+import threading
+
+import page_regions
+
+STREAMING = os.environ.get("IKEA_STREAMING", "") == "1"
+CHUNK_SIZE = 16 * 1024
+# Longest remainder read after an early stop to keep the connection alive
+DRAIN_BYTES = 64 * 1024
+# Sizes a streamed dimension needs to end the download early
+CONCLUSIVE_SIZES = 3
+
+_lock = threading.Lock()
+_stats = {"pages": 0, "stopped_early": 0, "drained": 0, "bytes_read": 0, "bytes_skipped": 0}
+
+
+def configure(streaming=None, drain_bytes=None):
+    """Turn streaming on or off and set how much of a remainder is drained."""
+    global STREAMING, DRAIN_BYTES
+    if streaming is not None:
+        STREAMING = streaming
+    if drain_bytes is not None:
+        DRAIN_BYTES = drain_bytes
+
+
+def _record(stopped_early, drained, bytes_read, content_length):
+    with _lock:
+        _stats["pages"] += 1
+        _stats["bytes_read"] += bytes_read
+        if stopped_early:
+            _stats["stopped_early"] += 1
+            if drained:
+                _stats["drained"] += 1
+            elif content_length:
+                _stats["bytes_skipped"] += max(content_length - bytes_read, 0)
+
+
+def _drain(chunks, bytes_read, content_length):
+    """Read the rest of the body if it is at most DRAIN_BYTES; True if it was all read."""
+    if content_length and content_length - bytes_read > DRAIN_BYTES:
+        return False
+    drained = 0
+    for chunk in chunks:
+        drained += len(chunk)
+        if drained > DRAIN_BYTES:
+            return False
+    return True
+
+
+def conclusive(dimension):
+    """True if `dimension` is complete enough to stop reading a page for."""
+    return dimension is not None and len(dimension.sizes) >= CONCLUSIVE_SIZES
+
+
+def read_until_dimensions(response, extract, chunk_size=CHUNK_SIZE):
+    """Read a `stream=True` response until `extract` finds a conclusive dimension.
+
+    `extract(kind, snippet)` gets each completed RegionScanner snippet and
+    returns (dimension, source), with dimension None when it has none.
+    Returns (html, known): the HTML parsed so far, and the (dimension, source)
+    pair if parsing stopped early (None when the whole body was parsed).
+    """
+    scanner = page_regions.RegionScanner()
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    header = response.headers.get("Content-Length")
+    content_length = int(header) if header and header.isdigit() else 0
+    chunks = response.iter_content(chunk_size)
+    known = None
+    drained = False
+    try:
+        for chunk in chunks:
+            for kind, snippet in scanner.feed(decoder.decode(chunk)):
+                dimension, source = extract(kind, snippet)
+                if conclusive(dimension):
+                    known = (dimension, source)
+                    break
+            if known:
+                break
+        else:
+            scanner.feed(decoder.decode(b"", final=True))
+        if known:
+            drained = _drain(chunks, _bytes_read(response, scanner), content_length)
+    finally:
+        _record(known is not None, drained, _bytes_read(response, scanner), content_length)
+        response.close()
+    return scanner.html, known
+
+
+def _bytes_read(response, scanner):
+    return response.raw.tell() if hasattr(response.raw, "tell") else len(scanner.html)
+
+
+def stats():
+    """Return a copy of the streaming counters."""
+    with _lock:
+        return dict(_stats)
+
+
+def describe_stats():
+    """One-line streaming summary for run summaries."""
+    s = stats()
+    return (f"{s['stopped_early']}/{s['pages']} pages stopped early "
+            f"({s['drained']} drained to keep the connection), "
+            f"{s['bytes_read'] / 1024 / 1024:.1f} MB read, "
+            f"{s['bytes_skipped'] / 1024 / 1024:.1f} MB not downloaded")
@@ -0,0 +1,93 @@
+"""dimension_patterns against the multi-pass pattern loop it replaced.
+
+Run from the repository root: python -m unittest
+"""
+import random
+import unittest
+
+import dimension_patterns
+from benchmark import multi_pass_extract
+from dimension_patterns import Dimension, first_dimension, parse_dimension, read_dimension
+
+
+def old_sizes(text):
+    """Sizes the multi-pass loop found in `text`, as floats, or None."""
+    found = multi_pass_extract(text)
+    if found == "N/A":
+        return None
+    return tuple(float(v) for v in found[:-len(" cm")].split("x"))
+
+
+def sizes(dimension):
+    return dimension.sizes if dimension is not None else None
+
+
+class ParseDimensionTest(unittest.TestCase):
+
+    def test_forms(self):
+        cases = {
+            "Bookcase, 80x28x202 cm": ("width", "depth", "height", (80, 28, 202)),
+            "Table 39 x 30 cm": ("width", "depth", None, (39, 30)),
+            "W 80 x D 28 x H 202 cm": ("width", "depth", "height", (80, 28, 202)),
+            "Length 10 x Width 20.5 x Height 30 CM": ("length", "width", "height", (10, 20.5, 30)),
+        }
+        for text, (*axes, expected) in cases.items():
+            with self.subTest(text=text):
+                dimension = parse_dimension(text)
+                self.assertEqual(dimension.sizes, tuple(float(v) for v in expected))
+                self.assertEqual(dimension.axes[:len(expected)], tuple(axes[:len(expected)]))
+
+    def test_three_sizes_win_over_an_earlier_two(self):
+        self.assertEqual(parse_dimension("Top 80x28 cm, frame 80x28x202 cm").format(), "80x28x202 cm")
+
+    def test_no_dimension(self):
+        for text in ("", None, "no sizes here", "75 cm", "80x28 mm"):
+            with self.subTest(text=text):
+                self.assertIsNone(parse_dimension(text))
+                self.assertEqual(dimension_patterns.extract_dimensions(text), "N/A")
+
+    def test_first_dimension_keeps_lone_measurements(self):
+        self.assertEqual(first_dimension("Height 75 cm, top 80x28 cm").format("cm"), "75cm")
+        self.assertEqual(first_dimension("90 x 55 cm").format("cm"), "90x55cm")
+        self.assertIsNone(first_dimension("no sizes"))
+
+    def test_text_round_trip(self):
+        dimension = Dimension((80, 28.5, 202), ("width", "depth", "height"))
+        self.assertEqual(dimension_patterns.dimension_text(dimension), "80x28.5x202 cm")
+        self.assertEqual(read_dimension("80x28.5x202 cm"), dimension)
+        self.assertEqual(dimension_patterns.dimension_text(None), "N/A")
+        self.assertIsNone(read_dimension("N/A"))
+
+    def test_same_sizes_as_multi_pass_loop(self):
+        tokens = ["1", "22", "3.5", "80.50", "x", "X", " x ", " ", "cm", " cm", "CM", "W ", "D ", "H ",
+                  "Length ", "Width ", "Height ", "a", ",", "\n", "  ", "lorem ipsum dolor sit amet " * 3, "İ"]
+        numbers = ["1", "22", "3.5", "80.50"]
+        rng = random.Random(2)
+        for _ in range(5000):
+            parts = []
+            for _ in range(rng.randint(5, 60)):
+                parts.append(rng.choice(tokens))
+                if rng.random() < 0.3:  # something shaped like a dimension, often with its label
+                    label = rng.choice(["", "W ", "Length "])
+                    parts.append(label + rng.choice(numbers) + rng.choice([" x ", "x"]) + rng.choice(["", "D ", "Width "])
+                                 + rng.choice(numbers) + rng.choice(["", " x H " + rng.choice(numbers),
+                                                                     "x" + rng.choice(numbers),
+                                                                     " x Height " + rng.choice(numbers)]))
+            text = "".join(parts)
+            expected = old_sizes(text)
+            with self.subTest(text=text):
+                self.assertEqual(sizes(parse_dimension(text, prefilter=False)), expected)
+                self.assertEqual(sizes(parse_dimension(text)), expected)
+                # again, now answered by the memo
+                self.assertEqual(sizes(parse_dimension(text)), expected)
+
+    def test_same_sizes_as_multi_pass_loop_on_page_sized_text(self):
+        filler = "<p>Lorem ipsum 12 x 3 mm, 40 cm wide</p>" * 500
+        for text in (filler + "W 60 x D 40 x H 90 cm" + filler,
+                     filler + "60x40 cm" + filler + "60 x 40 x 90 cm",
+                     filler):
+            self.assertEqual(sizes(parse_dimension(text)), old_sizes(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
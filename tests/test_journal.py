@@ -0,0 +1,123 @@
+"""Checkpoint journal: replay, torn lines, and skipping journaled work on resume.
+
+Run from the repository root: python -m unittest
+"""
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import dimension_store
+import dimensions
+import journal
+import parse_pool
+import strategy_stats
+from dimension_patterns import read_dimension
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        patcher = mock.patch.object(journal, "JOURNAL_DIR", self.dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_replay(self):
+        with journal.Journal("run") as j:
+            j.append("a", status="found", dimensions="80x28x202 cm", source="json_ld")
+            j.append("b", status="no_dimensions", dimensions="N/A", source=None)
+        j = journal.Journal("run")
+        self.assertEqual(j.completed, {
+            "a": {"status": "found", "dimensions": "80x28x202 cm", "source": "json_ld"},
+            "b": {"status": "no_dimensions", "dimensions": "N/A", "source": None},
+        })
+        self.assertEqual(j.get("a")["dimensions"], "80x28x202 cm")
+        self.assertIsNone(j.get("c"))
+
+    def test_torn_line_is_dropped_and_truncated(self):
+        with journal.Journal("run") as j:
+            j.append("a", status="found")
+        path = self.dir / "run.jsonl"
+        intact = path.read_bytes()
+        with open(path, "ab") as f:
+            f.write(b'{"key": "b", "sta')  # crash mid-write
+
+        j = journal.Journal("run")
+        self.assertEqual(list(j.completed), ["a"])
+        self.assertEqual(path.read_bytes(), intact)
+        with j:
+            j.append("c", status="found")
+        self.assertEqual(list(journal.Journal("run").completed), ["a", "c"])
+
+    def test_unreadable_line_ends_the_replay(self):
+        path = self.dir / "run.jsonl"
+        path.write_text('{"key": "a", "status": "found"}\nnot json\n{"key": "b", "status": "found"}\n')
+        self.assertEqual(list(journal.Journal("run").completed), ["a"])
+        self.assertEqual(path.read_text(), '{"key": "a", "status": "found"}\n')
+
+    def test_group_commit(self):
+        with mock.patch.object(journal, "COMMIT_SECONDS", 3600), mock.patch("os.fsync") as fsync:
+            j = journal.Journal("run", commit_every=3)
+            for key in "abcde":
+                j.append(key, status="found")
+            self.assertEqual(fsync.call_count, 1)
+            j.close()
+            self.assertEqual(fsync.call_count, 2)
+        self.assertEqual(len((self.dir / "run.jsonl").read_text().splitlines()), 5)
+
+    def test_finish_removes_the_journal(self):
+        j = journal.Journal("run")
+        j.append("a", status="found")
+        j.finish()
+        self.assertFalse((self.dir / "run.jsonl").exists())
+        self.assertEqual(journal.Journal("run").completed, {})
+
+
+class ResumeTest(unittest.TestCase):
+    """scrape_results_many answers journaled URLs without fetching them."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        for patcher in (mock.patch.object(journal, "JOURNAL_DIR", self.dir),
+                        mock.patch.object(dimension_store, "STORE_FILE", self.dir / "dimension_store.json"),
+                        mock.patch.object(strategy_stats, "STATS_FILE", self.dir / "strategy_stats.json"),
+                        mock.patch.object(parse_pool, "PARSE_MODE", "inline")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.scraped = []
+
+    def fake_scrape(self, url):
+        self.scraped.append(url)
+        if url.endswith("-fail"):
+            return dimensions.ScrapeResult(url, dimensions.FAILED, None, None, "HTTP 503")
+        return dimensions.ScrapeResult(url, dimensions.FOUND, read_dimension("80x28x202 cm"), "json_ld", None)
+
+    def run_many(self, urls):
+        with mock.patch.object(dimensions, "scrape_dimensions_result", self.fake_scrape):
+            with journal.Journal("resume") as checkpoint:
+                return {r.url: r for r in dimensions.scrape_results_many(urls, concurrency=2, checkpoint=checkpoint)}
+
+    def test_resume_skips_journaled_urls(self):
+        urls = ["https://x/p/a", "https://x/p/b-fail", "https://x/p/c"]
+        first = self.run_many(urls)
+        self.assertEqual(sorted(self.scraped), sorted(urls))
+        lines = [json.loads(line) for line in (self.dir / "resume.jsonl").read_text().splitlines()]
+        self.assertEqual(sorted(line["key"] for line in lines), ["https://x/p/a", "https://x/p/c"])
+
+        self.scraped.clear()
+        second = self.run_many(urls)
+        self.assertEqual(self.scraped, ["https://x/p/b-fail"])  # failures are retried
+        for url in ("https://x/p/a", "https://x/p/c"):
+            self.assertEqual(second[url].status, dimensions.FOUND)
+            self.assertEqual(second[url].dimension, first[url].dimension)
+            self.assertEqual(second[url].source, "json_ld")
+
+
+if __name__ == "__main__":
+    unittest.main()
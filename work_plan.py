@@ -0,0 +1,78 @@
+"""Cross-file work planning for the scraping stages.
+
+Loads every split file up front, canonicalizes product URLs and groups the
+product records that share one, so each unique product page is scraped once
+no matter how many query files (or duplicate entries) reference it.
+"""
+import json
+from urllib.parse import urlsplit, urlunsplit
+
+
+def canonical_url(url):
+    """Normalize a product URL: lowercase scheme/host, no query/fragment, trailing slash."""
+    parts = urlsplit(url.strip())
+    path = parts.path if parts.path.endswith("/") else parts.path + "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, "", ""))
+
+
+class WorkPlan:
+    """Deduplicated list of product URLs plus the records that reference each."""
+
+    def __init__(self):
+        self.documents = []      # (path, loaded JSON data)
+        self.errors = []         # (path, error message)
+        self.products_by_url = {}
+        self.references = 0      # product records with a URL
+        self.without_url = []    # product records with no URL
+
+    @property
+    def urls(self):
+        return list(self.products_by_url)
+
+    def add_file(self, path, url_field="Product URL"):
+        """Load one split file and index its products by canonical URL."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self.errors.append((path, str(e)))
+            return
+
+        self.documents.append((path, data))
+        for product in products_of(data):
+            url = product.get(url_field)
+            if not url:
+                self.without_url.append(product)
+                continue
+            self.products_by_url.setdefault(canonical_url(url), []).append(product)
+            self.references += 1
+
+    def apply(self, url, field, value):
+        """Set `field` to `value` on every product record that references `url`."""
+        products = self.products_by_url.get(canonical_url(url), [])
+        for product in products:
+            product[field] = value
+        return products
+
+    def describe(self):
+        """Summary of how many requests deduplication saves."""
+        unique = len(self.products_by_url)
+        saved = self.references - unique
+        percent = 100 * saved / self.references if self.references else 0
+        return (f"{unique} unique products from {self.references} product references "
+                f"across {len(self.documents)} files ({saved} requests saved, {percent:.1f}%)")
+
+
+def products_of(data):
+    """Product list of a split file, whether it is {"products": [...]} or a bare list."""
+    if isinstance(data, dict):
+        return data.get("products", [])
+    return data if isinstance(data, list) else []
+
+
+def build_plan(paths, url_field="Product URL"):
+    """Build a WorkPlan over all `paths`."""
+    plan = WorkPlan()
+    for path in paths:
+        plan.add_file(path, url_field=url_field)
+    return plan